@@ -1,9 +1,6 @@
 import streamlit as st
-import pandas as pd
 import src.database as db
-from src.simulation_mode import run_simulation_mode
-from src.gladiator_mode import run_gladiator_mode
-from src.report_generator import generate_csv_report
+from src.ui_cache import query, session_report
 
 # --- SETUP ---
 st.set_page_config(page_title="IdeaForge.AI", page_icon="⚔️", layout="wide")
@@ -21,10 +18,11 @@ with st.sidebar:
         st.session_state.app_mode = "Spectator (AI vs AI)"
     
     # Mode Selector
+    modes = ["Spectator (AI vs AI)", "Gladiator (You vs AI)", "Tournament (Wide Search)"]
     selected_mode = st.radio(
         "Select Mode", 
-        ["Spectator (AI vs AI)", "Gladiator (You vs AI)"],
-        index=0 if st.session_state.app_mode == "Spectator (AI vs AI)" else 1
+        modes,
+        index=modes.index(st.session_state.app_mode)
     )
     
     # If mode changes, reset view to "Live"
@@ -38,6 +36,8 @@ with st.sidebar:
     # --- GLOBAL SETTINGS ---
     if st.session_state.app_mode == "Spectator (AI vs AI)":
         st.header("⚙️ Simulation Config")
+    elif st.session_state.app_mode == "Tournament (Wide Search)":
+        st.header("⚙️ Tournament Config")
     else:
         st.header("⚙️ Gladiator Config")
         
@@ -45,14 +45,44 @@ with st.sidebar:
 
     st.divider()
 
+    # --- SEARCH (across every archived battle) ---
+    st.header("🔍 Search Ideas")
+    with st.form("search_form", border=False):
+        search_text = st.text_input("Titles, pitches, critiques & research", value=st.session_state.get("search_text", ""))
+        if st.form_submit_button("Search", use_container_width=True) and search_text.strip():
+            st.session_state.view_mode = "search"
+            st.session_state.search_text = search_text.strip()
+            st.rerun()
+
+    if st.button("📊 Leaderboards", use_container_width=True):
+        st.session_state.view_mode = "leaderboards"
+        st.rerun()
+
+    if st.button("⏱️ Performance", use_container_width=True):
+        st.session_state.view_mode = "performance"
+        st.rerun()
+
+    st.divider()
+
     # --- HISTORY SECTION (FILTERED) ---
     st.header("📜 Battle History")
     
     # Determine the tag based on current mode so we show relevant history only
-    current_mode_tag = "Spectator" if st.session_state.app_mode == "Spectator (AI vs AI)" else "Gladiator"
+    current_mode_tag = st.session_state.app_mode.split(" ")[0]
+    
+    niche_filter = st.text_input("🔎 Filter by niche", key=f"history_filter_{current_mode_tag}").strip()
     
-    # Fetch filtered sessions using the new DB function
-    past_sessions = db.get_sessions_by_mode(current_mode_tag)
+    # Fetch filtered sessions one page at a time (keyset pagination).
+    # Session state only remembers how far down the user has loaded ("until" = the oldest loaded row).
+    # Everything above it is re-read whenever the database changes, so new battles push rows down instead of hiding them.
+    first_page, first_cursor = query("get_sessions_page", current_mode_tag, niche_prefix=niche_filter)
+    older = st.session_state.setdefault(f"history_older_{current_mode_tag}_{niche_filter}", {"until": None, "cursor": None})
+    older_rows = []
+    if older["until"] and first_cursor:
+        older_rows = query("get_sessions_range", current_mode_tag, first_cursor, older["until"], niche_prefix=niche_filter)
+    next_cursor = older["cursor"] if older["until"] else first_cursor
+    
+    past_sessions = first_page + older_rows
     
     if not past_sessions:
         st.caption(f"No {current_mode_tag} battles recorded yet.")
@@ -67,6 +97,14 @@ with st.sidebar:
                 st.session_state.selected_session_id = s_id
                 st.session_state.selected_session_name = s_niche
                 st.rerun()
+        
+        if next_cursor and st.button("⬇️ Load more", use_container_width=True):
+            rows, cursor = query("get_sessions_page", current_mode_tag, cursor=next_cursor, niche_prefix=niche_filter)
+            if rows:
+                last_id, _, last_time = rows[-1]
+                older["until"] = (last_time, last_id)
+            older["cursor"] = cursor
+            st.rerun()
                 
     if st.button("⬅️ Back to Live Game", use_container_width=True):
         st.session_state.view_mode = "live"
@@ -78,49 +116,237 @@ with st.sidebar:
 
 # CASE 1: HISTORY VIEW
 if st.session_state.get("view_mode") == "history":
+    import pandas as pd  # Tables only; kept off the cold-start path of the live view
     s_id = st.session_state.get("selected_session_id")
     s_name = st.session_state.get("selected_session_name")
     
     st.info(f"📂 Viewing Archived Session #{s_id}: {s_name}")
     
-    # Load Data
-    history_ideas = db.get_session_ideas(s_id)
+    # Load Data (leaderboard columns only; heavy text is fetched per idea on demand)
+    history_rows = query("get_session_leaderboard", s_id)
     
-    if history_ideas:
-        # 1. Download Button
-        csv_data = generate_csv_report(history_ideas)
-        st.download_button("📥 Download This Report", csv_data, "history_report.csv", "text/csv")
+    if history_rows:
+        # 1. Download Button (the full report needs every field, so it is only built on click)
+        st.download_button(
+            "📥 Download This Report",
+            lambda: session_report(s_id),
+            "history_report.csv",
+            "text/csv"
+        )
         
         # 2. Leaderboard
         st.subheader("🏆 Final Standings")
         data = []
-        for idea in history_ideas:
+        for row in history_rows:
             data.append({
-                "Title": idea.title,
-                "Score": f"{idea.score_overall:.1f}",
-                "Feasibility": idea.score_feasibility,
-                "Moat": idea.score_moat,
-                "Market": idea.score_market,
-                "Pitch": idea.description
+                "Title": row["title"],
+                "Score": f"{row['score_overall']:.1f}",
+                "Feasibility": row["score_feasibility"],
+                "Moat": row["score_moat"],
+                "Market": row["score_market"],
+                "Pitch": row["description"]
             })
         st.dataframe(pd.DataFrame(data), use_container_width=True)
         
         # 3. Details
         st.markdown("### 📝 Detailed Records")
-        for idea in history_ideas:
-            with st.expander(f"{idea.title} (Score: {idea.score_overall:.1f})"):
-                st.write(f"**Pitch:** {idea.description}")
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.info(f"**Research:**\n{idea.market_research}")
-                with col2:
-                    st.warning(f"**Critique:**\n{idea.critique}")
-
-# CASE 2: LIVE GAME MODES
+        for row in history_rows:
+            # on_change="rerun" tracks open/closed, so the body only runs for opened expanders
+            with st.expander(
+                f"{row['title']} (Score: {row['score_overall']:.1f})", key=f"details_{row['id']}", on_change="rerun"
+            ) as details_box:
+                st.write(f"**Pitch:** {row['description']}")
+                # Research & critique are the big fields: only load them for ideas the user opens up
+                if details_box.open:
+                    details = query("get_idea_details", row["id"])
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.info(f"**Research:**\n{details['market_research']}")
+                    with col2:
+                        st.warning(f"**Critique:**\n{details['critique']}")
+
+        # 4. Trajectory (every roasted iteration, saved as the battle ran)
+        with st.expander("🧬 Refinement Trajectory", key=f"trajectory_{s_id}", on_change="rerun") as trajectory_box:
+            if trajectory_box.open:
+                iterations = query("get_session_iterations", s_id)
+                if iterations:
+                    st.dataframe(pd.DataFrame([{
+                        "Round": it["round_id"],
+                        "Iteration": it["iteration_count"],
+                        "Title": it["title"],
+                        "Score": f"{it['score_overall']:.1f}",
+                        "Feasibility": it["score_feasibility"],
+                        "Moat": it["score_moat"],
+                        "Market": it["score_market"]
+                    } for it in iterations]), use_container_width=True)
+                else:
+                    st.caption("No iteration history was recorded for this battle.")
+
+# CASE 2: SEARCH RESULTS
+elif st.session_state.get("view_mode") == "search":
+    search_text = st.session_state.get("search_text", "")
+    results = query("search_ideas", search_text, limit=50)
+    
+    st.info(f"🔍 {len(results)} result(s) for \"{search_text}\"")
+    
+    for result in results:
+        with st.container(border=True):
+            c1, c2 = st.columns([4, 1])
+            with c1:
+                mode_tag = f" ({result['mode']})" if result["mode"] else ""
+                st.markdown(f"**{result['title']}** · _{result['niche']}_{mode_tag}")
+                st.caption(result["snippet"])
+            with c2:
+                st.metric("Score", f"{result['score_overall']:.1f}")
+                if st.button("Open battle", key=f"search_open_{result['id']}"):
+                    st.session_state.view_mode = "history"
+                    st.session_state.selected_session_id = result["session_id"]
+                    st.session_state.selected_session_name = result["niche"]
+                    st.rerun()
+
+# CASE 3: CROSS-SESSION LEADERBOARDS (pre-aggregated, so cost doesn't grow with history)
+elif st.session_state.get("view_mode") == "leaderboards":
+    import pandas as pd
+    st.subheader("📊 Leaderboards")
+    stat_modes = query("get_stat_modes")
+    
+    if not stat_modes:
+        st.caption("No battles recorded yet.")
+    else:
+        lb_mode = st.radio("Mode", stat_modes, horizontal=True)
+        niche_stats = query("get_niche_stats", lb_mode)
+        niche_label = lambda n: "🌍 All niches" if n == db.ALL_NICHES else n
+        
+        # 1. Niche overview
+        st.dataframe(
+            pd.DataFrame([{
+                "Niche": niche_label(row["niche"]),
+                "Battles": row["sessions"],
+                "Ideas": row["ideas"],
+                "Avg Score": round(row["avg_score"], 2),
+                "Std Dev": round(row["std_score"], 2),
+                "Avg Feasibility": round(row["avg_feasibility"], 1),
+                "Avg Moat": round(row["avg_moat"], 1),
+                "Avg Market": round(row["avg_market"], 1),
+                "Best": row["best_score"],
+            } for row in niche_stats]),
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        # 2. Drill into one niche
+        lb_niche = st.selectbox("Niche", [row["niche"] for row in niche_stats], format_func=niche_label)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("#### 🏆 Best Ideas Ever")
+            top = query("get_top_ideas", lb_niche, lb_mode)
+            st.dataframe(
+                pd.DataFrame([{"Title": t["title"], "Score": t["score_overall"], "Battle": f"#{t['session_id']}"} for t in top]),
+                use_container_width=True,
+                hide_index=True
+            )
+        with col2:
+            st.markdown("#### 📈 Score Distribution")
+            histogram = query("get_score_histogram", lb_niche, lb_mode)
+            st.bar_chart(pd.Series([histogram.get(b, 0) for b in range(11)], index=range(11), name="Ideas"))
+
+# CASE 4: PERFORMANCE (where battles spend their time and money, from the trace spans)
+elif st.session_state.get("view_mode") == "performance":
+    import pandas as pd
+    from src import tracing
+    st.subheader("⏱️ Performance")
+    spans = tracing.get_sink().recent_spans()
+    
+    if not spans:
+        st.caption("No traces recorded yet. Run a battle (tracing is on unless IDEAFORGE_TRACING=0).")
+    else:
+        battles = tracing.battle_costs(spans)
+        llm_spans = [s for s in spans if s["kind"] == "llm"]
+        
+        # 1. Headline numbers
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Battles traced", len(battles))
+        c2.metric("Avg cost / battle", f"${sum(b['cost_usd'] for b in battles) / len(battles):.4f}" if battles else "-")
+        c3.metric("Avg battle time", f"{sum(b['wall_s'] for b in battles) / len(battles):.1f}s" if battles else "-")
+        c4.metric("LLM cache hits", f"{sum(s['cache_hit'] for s in llm_spans) / len(llm_spans):.0%}" if llm_spans else "-")
+        
+        # 2. Per-node latency
+        st.markdown("#### 🧩 Node Latency")
+        st.dataframe(
+            pd.DataFrame([{
+                "Node": row["name"],
+                "Runs": row["calls"],
+                "p50 (s)": round(row["p50_ms"] / 1000, 2),
+                "p95 (s)": round(row["p95_ms"] / 1000, 2),
+                "p99 (s)": round(row["p99_ms"] / 1000, 2),
+                "Max (s)": round(row["max_ms"] / 1000, 2),
+                "Errors": row["errors"],
+            } for row in tracing.latency_summary(spans, "node")]),
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        # 3. Provider calls (Gemini + search)
+        st.markdown("#### 🌐 Gemini & Search Calls")
+        st.dataframe(
+            pd.DataFrame([{
+                "Call": f"{kind}: {row['name']}",
+                "Calls": row["calls"],
+                "p50 (s)": round(row["p50_ms"] / 1000, 2),
+                "p95 (s)": round(row["p95_ms"] / 1000, 2),
+                "Cache Hits": f"{row['cache_hit_rate']:.0%}",
+                "Retries": row["retries"],
+                "Errors": row["errors"],
+                "Prompt Tokens": row["prompt_tokens"],
+                "Output Tokens": row["output_tokens"],
+            } for kind in ("llm", "search") for row in tracing.latency_summary(spans, kind)]),
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        # 4. Prompt budget (what each prompt is made of, before it is sent)
+        st.markdown("#### 📏 Prompt Budget")
+        st.dataframe(
+            pd.DataFrame([{
+                "Step": row["name"],
+                "Calls": row["calls"],
+                "Gemini Prompt Tokens": round(row["avg_prompt_tokens"]) if row["avg_prompt_tokens"] else None,
+                **{f"{key} (est. tokens)": round(tokens) for key, tokens in row["inputs"].items()},
+            } for row in tracing.prompt_budget(spans)]),
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        # 5. Cost per battle
+        st.markdown("#### 💸 Cost per Battle")
+        st.caption(f"Estimated at ${tracing.INPUT_COST_PER_MTOK}/M input and ${tracing.OUTPUT_COST_PER_MTOK}/M output tokens; cached calls are free.")
+        st.dataframe(
+            pd.DataFrame([{
+                "Battle": b["session_id"],
+                "Wall (s)": round(b["wall_s"], 1),
+                "LLM Calls": b["llm_calls"],
+                "Cached": b["cached_calls"],
+                "Searches": b["searches"],
+                "Prompt Tokens": b["prompt_tokens"],
+                "Output Tokens": b["output_tokens"],
+                "Cost (USD)": round(b["cost_usd"], 5),
+            } for b in battles[:50]]),
+            use_container_width=True,
+            hide_index=True
+        )
+
+# CASE 5: LIVE GAME MODES
 else:
     # Only run the game logic if we are NOT in history mode
+    # (each mode is imported on demand, so a session only loads the agent stack it uses)
     if st.session_state.app_mode == "Spectator (AI vs AI)":
+        from src.simulation_mode import run_simulation_mode
         run_simulation_mode(niche_input)
         
     elif st.session_state.app_mode == "Gladiator (You vs AI)":
-        run_gladiator_mode(niche_input)
\ No newline at end of file
+        from src.gladiator_mode import run_gladiator_mode
+        run_gladiator_mode(niche_input)
+
+    elif st.session_state.app_mode == "Tournament (Wide Search)":
+        from src.tournament_mode import run_tournament_mode
+        run_tournament_mode(niche_input)
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""Cold-import budget for the app entry points.
+
+Each target is imported in a fresh interpreter (several times, median taken) and checked
+against its time budget and its list of modules it must not load.
+
+    python benchmarks/import_budget.py            # check every target
+    python benchmarks/import_budget.py -n 9 -v    # more runs, show the heaviest imports
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# target -> (code run in the child, budget in seconds, top-level packages that must stay unloaded)
+TARGETS = {
+    # Database-only tooling must never pay for the LLM / graph stack
+    "src.database": ("import src.database", 0.4, ["langchain_core", "langgraph", "langchain_google_genai", "langchain_community", "pandas"]),
+    # CLI runner: the parent only needs the process pool; workers import the graph themselves
+    "main": ("import main", 0.4, ["langgraph", "langchain_google_genai", "langchain_community", "pandas"]),
+    # Streamlit script, first render of the default (Spectator, live) view in bare mode
+    "app.py": (f"import runpy; runpy.run_path({os.path.join(ROOT, 'app.py')!r})", 1.0,
+               ["langgraph", "langchain_google_genai", "langchain_community"]),
+}
+
+CHILD = """
+import json, sys, time, warnings, logging
+warnings.simplefilter("ignore")
+logging.disable(logging.WARNING)
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print("\\n@@" + json.dumps({{"seconds": elapsed, "modules": sorted({{m.split(".")[0] for m in sys.modules}})}}))
+"""
+
+
+def measure(code, cwd, importtime=False):
+    """One cold run: (seconds, loaded top-level packages, stderr)"""
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD.format(root=ROOT, code=code)]
+    proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "child failed")
+    payload = json.loads(proc.stdout.rsplit("@@", 1)[1])
+    return payload["seconds"], set(payload["modules"]), proc.stderr
+
+
+def heaviest_imports(importtime_output, top=8):
+    """Top-level packages by cumulative import time, from `python -X importtime` output"""
+    rows = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if not name.startswith(" ") and "." not in name:
+            rows.append((int(cumulative) / 1e6, name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", help=f"Targets to check (default: all of {', '.join(TARGETS)})")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="Cold runs per target (median is reported)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the heaviest imports of each target")
+    args = parser.parse_args()
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+
+    failed = False
+    # Scratch cwd: app.py creates its SQLite files relative to the working directory
+    with tempfile.TemporaryDirectory() as cwd:
+        for name in args.targets or TARGETS:
+            code, budget, forbidden = TARGETS[name]
+            runs = [measure(code, cwd) for _ in range(args.runs)]
+            median = statistics.median(seconds for seconds, _, _ in runs)
+            leaked = sorted(set(forbidden) & runs[0][1])
+
+            ok = median <= budget and not leaked
+            failed |= not ok
+            print(f"{'✅' if ok else '❌'} {name:<14} {median:6.2f}s (budget {budget:.2f}s)"
+                  + (f" | must not import: {', '.join(leaked)}" if leaked else ""))
+
+            if args.verbose:
+                _, _, stderr = measure(code, cwd, importtime=True)
+                for seconds, module in heaviest_imports(stderr):
+                    print(f"     {seconds:6.2f}s  {module}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
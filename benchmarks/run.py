@@ -0,0 +1,403 @@
+"""Offline benchmark suite: graph, halving tournament, nodes, Gladiator pipelines and the database.
+
+Gemini and DuckDuckGo are replaced by the deterministic stubs in benchmarks/stubs.py, and every
+SQLite file (history, research cache) lives in a scratch directory, so runs are repeatable and free.
+Each scenario records wall time, provider call counts, prompt/output tokens and peak memory
+(tracemalloc), and is compared against two baselines:
+
+- benchmarks/baseline.json (committed): call counts and prompt tokens, which are deterministic
+  under the stubs, so any increase fails the run on every machine. Recorded with --quick.
+- benchmarks/baseline.local.json (git-ignored): wall time and memory of this machine.
+
+    python benchmarks/run.py --quick                  # compare with both baselines
+    python benchmarks/run.py --quick --save-baseline  # record the current numbers (commit baseline.json)
+    python benchmarks/run.py -k graph --llm-latency 0.05 --failure-rate 0.05
+    python benchmarks/run.py --quick -o results.json
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")             # Counts (committed)
+LOCAL_BASELINE = os.path.join(BENCH_DIR, "baseline.local.json")          # Timings (this machine only)
+
+# Stubs answer instantly: no quota to respect, and never replay recorded Gemini answers
+os.environ.setdefault("IDEAFORGE_GEMINI_RPM", "1000000")
+os.environ.setdefault("IDEAFORGE_SEARCH_RPM", "1000000")
+os.environ["IDEAFORGE_LLM_CACHE"] = "off"
+
+GRAPH_SIZES = [(1, 1), (2, 2), (3, 3)]
+QUICK_GRAPH_SIZES = [(1, 1), (2, 2)]
+
+# Call counts are deterministic, so any increase is a regression; times get a tolerance
+COUNT_METRICS = ("llm_calls", "search_calls", "prompt_tokens")
+
+
+# ==========================================
+# SCENARIOS
+# ==========================================
+
+class Bench:
+    """Options, stubs and the scenario registry for one suite run"""
+
+    def __init__(self, args):
+        from benchmarks.stubs import StubChatModel, StubSearch
+
+        self.args = args
+        self.llm = StubChatModel(latency=args.llm_latency, failure_rate=args.failure_rate, seed=args.seed)
+        self.search = StubSearch(latency=args.search_latency, failure_rate=args.failure_rate, seed=args.seed)
+        self.scenarios = []
+        self._populated_db = None
+
+    def scenario(self, name):
+        def register(fn):
+            self.scenarios.append((name, fn))
+            return fn
+        return register
+
+    def counters(self):
+        return {**self.llm.stats(), **self.search.stats()}
+
+
+def _config(niche, rounds, iterations, parallel):
+    from src.models import BattleConfig
+    return BattleConfig(niche=niche, max_rounds=rounds, max_iterations=iterations, parallel_rounds=parallel)
+
+
+def _sample_idea(n, with_research=True):
+    from src.models import BusinessIdea
+    return BusinessIdea(
+        title=f"SiteSense {n}",
+        description="Computer vision for construction progress tracking.",
+        target_niche=f"Construction Tech {n}",
+        market_research=("**Market Data:** Procore reports 12% growth. Autodesk expands.\n\n"
+                         "**Competitors:** Fieldwire and PlanGrid dominate.") if with_research else None,
+        critique="Procore already does this; the moat is thin.",
+        score_feasibility=6, score_moat=4, score_market=7, score_overall=5.7,
+        round_id=1, iteration_count=1,
+    )
+
+
+def _save_sessions(db, count, ideas_per_session=3):
+    for n in range(count):
+        ideas = [_sample_idea(n * ideas_per_session + i) for i in range(ideas_per_session)]
+        db.save_battle(f"Niche {n % 50}", ideas, mode="Spectator" if n % 4 else "Gladiator")
+
+
+def register_scenarios(bench):
+    args = bench.args
+    repeat = args.repeat
+
+    # --- End to end: build_graph().invoke ---
+    for rounds, iterations in (QUICK_GRAPH_SIZES if args.quick else GRAPH_SIZES):
+        for parallel in (False, True):
+            label = "parallel" if parallel else "sequential"
+
+            @bench.scenario(f"graph.invoke.{rounds}x{iterations}.{label}")
+            def _(rounds=rounds, iterations=iterations, parallel=parallel):
+                from src.graph import build_graph, graph_run_config
+                from src.models import BattleState
+                config = _config("AI Tools for Construction Industry", rounds, iterations, parallel)
+                result = build_graph().invoke(BattleState(config=config), config=graph_run_config(config))
+                assert len(result["completed_ideas"]) == rounds
+
+    # --- Successive-halving tournament (20 ideas; compare tokens per idea with graph.invoke) ---
+    @bench.scenario("halving.20x0.25x3")
+    def _():
+        from src.halving import run_halving
+        from src.models import HalvingConfig
+        ideas = run_halving(HalvingConfig(niche="AI Tools for Construction Industry", pool_size=20, keep_fraction=0.25, rounds=3))
+        assert len(ideas) == 20
+
+    # --- Each node in isolation (distinct topics, so the research cache never short-circuits) ---
+    @bench.scenario(f"node.generate.x{repeat}")
+    def _():
+        from src.agents import generate_node
+        from src.models import BattleState
+        for n in range(repeat):
+            generate_node(BattleState(config=_config(f"Niche {n}", 1, 1, False)))
+
+    @bench.scenario(f"node.refine.x{repeat}")
+    def _():
+        from src.agents import generate_node
+        from src.models import BattleState
+        for n in range(repeat):
+            generate_node(BattleState(config=_config(f"Niche {n}", 1, 2, False), current_iteration=1,
+                                      current_idea=_sample_idea(n)))
+
+    @bench.scenario(f"node.research.x{repeat}")
+    def _():
+        from src.agents import research_node
+        from src.models import BattleState
+        for n in range(repeat):
+            research_node(BattleState(config=_config("Niche", 1, 1, False), current_idea=_sample_idea(n, False)))
+
+    @bench.scenario(f"node.research.incremental.x{repeat}")
+    def _():
+        from src.agents import research_node
+        from src.models import BattleState
+        for n in range(repeat):
+            previous = _sample_idea(n)
+            research_node(BattleState(config=_config("Niche", 1, 2, False), current_iteration=2,
+                                      current_idea=_sample_idea(n + repeat, False), all_iterations=[previous]))
+
+    @bench.scenario(f"node.roast.x{repeat}")
+    def _():
+        from src.agents import roast_node
+        from src.models import BattleState
+        for n in range(repeat):
+            roast_node(BattleState(config=_config("Niche", 1, 1, False), current_idea=_sample_idea(n)))
+
+    # --- Gladiator pipelines (both sides of one turn) ---
+    @bench.scenario(f"gladiator.opening.x{repeat}")
+    def _():
+        from src.gladiator_mode import user_opening_pipeline, ai_opening_pipeline
+        for n in range(repeat):
+            user_opening_pipeline(f"Niche {n}", f"My Idea {n}", "Drones that inspect scaffolding.")
+            ai_opening_pipeline(f"Niche {n}")
+
+    @bench.scenario(f"gladiator.refinement.x{repeat}")
+    def _():
+        from src.gladiator_mode import user_refinement_pipeline, ai_refinement_pipeline
+        for n in range(repeat):
+            user_refinement_pipeline(_sample_idea(n), "Drones plus insurance-grade inspection reports.")
+            ai_refinement_pipeline(_sample_idea(n + repeat))
+
+    # --- Database at scale ---
+    sessions = args.db_sessions
+
+    @bench.scenario(f"db.save_battle.x{sessions}")
+    def _():
+        import src.database as db
+        db.DB_NAME = os.path.abspath(f"history_{sessions}.db")
+        _save_sessions(db, sessions)
+        bench._populated_db = db.DB_NAME
+
+    def use_populated_db():
+        import src.database as db
+        if bench._populated_db is None:
+            db.DB_NAME = os.path.abspath(f"history_{sessions}.db")
+            _save_sessions(db, sessions)
+            bench._populated_db = db.DB_NAME
+        db.DB_NAME = bench._populated_db
+        return db
+
+    @bench.scenario(f"db.history_pages.{sessions}")
+    def _():
+        db = use_populated_db()
+        cursor, pages = None, 0
+        while pages < 50:
+            rows, cursor = db.get_sessions_page("Spectator", cursor=cursor)
+            pages += 1
+            if cursor is None:
+                break
+        db.get_sessions_page("Spectator", niche_prefix="Niche 1")
+
+    @bench.scenario(f"db.session_load.{sessions}")
+    def _():
+        db = use_populated_db()
+        for session_id in range(1, sessions + 1, max(1, sessions // 200)):
+            for row in db.get_session_leaderboard(session_id):
+                db.get_idea_details(row["id"])
+            db.get_session_ideas(session_id)
+
+    @bench.scenario(f"db.search_and_stats.{sessions}")
+    def _():
+        db = use_populated_db()
+        for text in ("procore", "SiteSense 42", "moat thin", "fieldwire plangrid"):
+            db.search_ideas(text, limit=50)
+        for mode in db.get_stat_modes():
+            for row in db.get_niche_stats(mode):
+                db.get_top_ideas(row["niche"], mode)
+                db.get_score_histogram(row["niche"], mode)
+
+
+def run_scenario(bench, fn):
+    """Wall time, call deltas and peak traced memory of one scenario"""
+    from src.research_cache import research_cache
+    from src.resilience import get_breaker, PROVIDER_SETTINGS
+
+    research_cache.clear()
+    for provider in PROVIDER_SETTINGS:
+        get_breaker(provider).record_success()
+    before = bench.counters()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    error = None
+    quiet = contextlib.nullcontext() if bench.args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        try:
+            fn()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    after = bench.counters()
+    result = {"wall_s": round(wall, 4), "peak_mem_kb": round(peak / 1024, 1)}
+    result.update({key: after[key] - before[key] for key in after})
+    if error:
+        result["error"] = error
+    return result
+
+
+# ==========================================
+# BASELINE COMPARISON
+# ==========================================
+
+def load_baseline(path, settings):
+    """Stored scenarios of a baseline file, or {} if it is missing or was recorded with other settings"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        stored = json.load(f)
+    if stored["settings"] != settings:
+        print(f"⚠️ {os.path.basename(path)} was recorded with different settings ({stored['settings']}); not comparing.")
+        return {}
+    return stored["scenarios"]
+
+
+def save_baseline(path, settings, scenarios):
+    """Merge into the stored baseline (a filtered run only replaces its own scenarios)"""
+    merged = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored["settings"] == settings:
+            merged = stored["scenarios"]
+    merged.update(scenarios)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"settings": settings, "scenarios": dict(sorted(merged.items()))}, f, indent=2)
+        f.write("\n")
+
+
+def compare(results, counts, timings, tolerance):
+    """Regressions as human-readable lines (empty when everything is within bounds)"""
+    problems = []
+    for name, current in results.items():
+        if "error" in current:
+            problems.append(f"{name}: failed ({current['error']})")
+            continue
+        if name in counts:
+            for key in COUNT_METRICS:
+                if current.get(key, 0) > counts[name].get(key, 0):
+                    problems.append(f"{name}: {key} {counts[name].get(key, 0)} -> {current[key]}")
+        previous = timings.get(name)
+        if not previous:
+            continue
+        if current["wall_s"] > previous["wall_s"] * (1 + tolerance) and current["wall_s"] - previous["wall_s"] > 0.05:
+            problems.append(f"{name}: wall {previous['wall_s']:.3f}s -> {current['wall_s']:.3f}s")
+        if current["peak_mem_kb"] > previous["peak_mem_kb"] * (1 + tolerance) + 256:
+            problems.append(f"{name}: peak memory {previous['peak_mem_kb']:.0f}KB -> {current['peak_mem_kb']:.0f}KB")
+    return problems
+
+
+def print_table(results, baseline):
+    print(f"{'scenario':<40} {'wall s':>8} {'vs base':>8} {'llm':>5} {'search':>6} {'prompt tok':>10} {'peak KB':>9}")
+    for name, r in results.items():
+        previous = baseline.get(name)
+        delta = f"{(r['wall_s'] / previous['wall_s'] - 1) * 100:+.0f}%" if previous and previous["wall_s"] else "-"
+        print(f"{name:<40} {r['wall_s']:>8.3f} {delta:>8} {r['llm_calls']:>5} {r['search_calls']:>6} "
+              f"{r['prompt_tokens']:>10} {r['peak_mem_kb']:>9.0f}" + (f"  ❌ {r['error']}" if "error" in r else ""))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="🧪 IdeaForge.AI offline benchmarks (stub Gemini + search)")
+    parser.add_argument("-k", "--filter", default="", help="Only run scenarios whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="Smaller graph sizes and 1000 DB sessions")
+    parser.add_argument("--repeat", type=int, default=10, help="Calls per node / Gladiator scenario")
+    parser.add_argument("--db-sessions", type=int, default=None, help="Sessions saved for the DB scenarios (default 10000)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds added to every stub LLM call")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="Seconds added to every stub search")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of provider calls that fail (retryable)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for failure injection")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Call-count baseline JSON (committed)")
+    parser.add_argument("--local-baseline", default=LOCAL_BASELINE, help="Timing / memory baseline JSON (this machine)")
+    parser.add_argument("--save-baseline", action="store_true", help="Record this run's results in both baselines")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before flagging")
+    parser.add_argument("-o", "--output", help="Also write this run's results as JSON to this path")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the app's own progress output")
+    args = parser.parse_args()
+    if args.db_sessions is None:
+        args.db_sessions = 1000 if args.quick else 10000
+    return args
+
+
+def main():
+    args = parse_args()
+    settings = {key: getattr(args, key) for key in ("quick", "repeat", "db_sessions", "llm_latency",
+                                                    "search_latency", "failure_rate", "seed")}
+    counts, timings = {}, {}
+    if not args.save_baseline:
+        counts = load_baseline(args.baseline, settings)
+        timings = load_baseline(args.local_baseline, settings)
+
+    results = {}
+    # Scratch cwd: ideaforge.db / research_cache.db are created relative to it
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        import src.database as db
+        import src.resilience as resilience
+        from benchmarks.stubs import installed
+
+        db.DB_NAME = os.path.abspath("ideaforge.db")
+        # Injected failures are retried with real backoff; keep the sleeps short
+        resilience.BASE_BACKOFF_SECONDS = 0.01
+
+        # Import everything up front so one-off import cost doesn't land in the first scenario
+        for module in ("src.graph", "src.gladiator_mode"):
+            importlib.import_module(module)
+
+        bench = Bench(args)
+        register_scenarios(bench)
+        with installed(bench.llm, bench.search):
+            for name, fn in bench.scenarios:
+                if args.filter in name:
+                    print(f"… {name}", file=sys.stderr)
+                    results[name] = run_scenario(bench, fn)
+                    db.DB_NAME = os.path.abspath("ideaforge.db")
+        os.chdir(ROOT)
+
+    print_table(results, timings)
+    report = {"settings": settings, "python": sys.version.split()[0], "scenarios": results}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        ok = {name: r for name, r in results.items() if "error" not in r}
+        save_baseline(args.baseline, settings, {name: {key: r[key] for key in COUNT_METRICS} for name, r in ok.items()})
+        save_baseline(args.local_baseline, settings, ok)
+        print(f"\n📌 Baselines saved to {args.baseline} and {args.local_baseline}")
+        return
+
+    if not counts:
+        print("\n⚠️ No call-count baseline for these settings: counts are not checked (baseline.json is recorded with --quick).")
+    missing = [name for name in results if name not in counts] if counts else []
+    if missing:
+        print(f"⚠️ Not in the call-count baseline yet: {', '.join(missing)}")
+
+    problems = compare(results, counts, timings, args.tolerance)
+    if problems:
+        print("\n❌ Regressions vs baseline:")
+        for line in problems:
+            print(f"  - {line}")
+        sys.exit(1)
+    print("\n✅ No regressions vs baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Deterministic local stand-ins for Gemini and DuckDuckGo (no network, no API key).
+
+Both stubs count calls, can add latency and can inject provider-style failures that
+src.resilience treats as retryable, so retries and backoff are exercised too.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+COMPETITORS = ["Procore", "Autodesk", "Buildertrend", "Fieldwire", "PlanGrid", "Trimble", "Oracle Aconex", "Bluebeam"]
+
+
+class InjectedProviderError(RuntimeError):
+    """Looks like a throttled / flaky provider ("503 unavailable"), so it is retried"""
+
+
+def _digest(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:12], 16)
+
+
+def approx_tokens(text: str) -> int:
+    """~4 characters per token, good enough for relative comparisons"""
+    return max(1, len(text) // 4)
+
+
+class FailureInjector:
+    """Fails a fixed fraction of calls; the sequence only depends on `seed`"""
+
+    def __init__(self, rate: float = 0.0, seed: int = 0):
+        self.rate = rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def maybe_fail(self, provider: str):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.rate:
+            raise InjectedProviderError(f"503 {provider} unavailable (injected)")
+
+
+class StubChatModel(BaseChatModel):
+    """Returns a valid BusinessIdea JSON for any prompt; the content is a pure function of the prompt"""
+
+    latency: float = 0.0
+    failure_rate: float = 0.0
+    seed: int = 0
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _failures: Any = PrivateAttr(default=None)
+    _calls: int = PrivateAttr(default=0)
+    _failed: int = PrivateAttr(default=0)
+    _prompt_tokens: int = PrivateAttr(default=0)
+    _output_tokens: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context):
+        self._failures = FailureInjector(self.failure_rate, self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-gemini"
+
+    def _respond(self, prompt: str) -> str:
+        n = _digest(prompt)
+        feasibility, moat, market = 3 + n % 7, 2 + (n >> 4) % 8, 3 + (n >> 8) % 7
+        return json.dumps({
+            "title": f"{COMPETITORS[n % len(COMPETITORS)].split()[0]}Killer {n % 997}",
+            "description": "An AI co-pilot that turns site photos into schedule risk alerts for mid-size contractors.",
+            "target_niche": "",
+            "score_feasibility": feasibility,
+            "score_moat": moat,
+            "score_market": market,
+            "score_overall": round((feasibility + moat + market) / 3, 1),
+            "critique": f"{COMPETITORS[(n >> 12) % len(COMPETITORS)]} already owns the workflow; the moat is thin. " * 3,
+        })
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        prompt = "\n".join(str(m.content) for m in messages)
+        with self._lock:
+            self._calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            self._failures.maybe_fail("gemini")
+        except InjectedProviderError:
+            with self._lock:
+                self._failed += 1
+            raise
+
+        text = self._respond(prompt)
+        usage = {"input_tokens": approx_tokens(prompt), "output_tokens": approx_tokens(text)}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        with self._lock:
+            self._prompt_tokens += usage["input_tokens"]
+            self._output_tokens += usage["output_tokens"]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage))])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "llm_calls": self._calls,
+                "llm_failures": self._failed,
+                "prompt_tokens": self._prompt_tokens,
+                "output_tokens": self._output_tokens,
+            }
+
+
+class StubSearch:
+    """Stand-in for DuckDuckGoSearchRun: deterministic snippets of roughly `result_chars` characters"""
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0, result_chars: int = 1500):
+        self.latency = latency
+        self.result_chars = result_chars
+        self._failures = FailureInjector(failure_rate, seed + 1)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failed = 0
+
+    def invoke(self, query: str) -> str:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            self._failures.maybe_fail("search")
+        except InjectedProviderError:
+            with self._lock:
+                self.failed += 1
+            raise
+
+        n = _digest(query)
+        sentences = []
+        while sum(len(s) + 1 for s in sentences) < self.result_chars:
+            i = len(sentences)
+            name = COMPETITORS[(n + i) % len(COMPETITORS)]
+            sentences.append(f"{name} reports {(n >> i) % 40 + 5}% growth in {query[:40]} adoption in 2025.")
+        return " ".join(sentences)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"search_calls": self.calls, "search_failures": self.failed}
+
+
+@contextmanager
+def installed(llm: StubChatModel, search: StubSearch):
+    """Route src.agents / src.tools to the stubs for the duration of the block.
+
+    Like the real client, the stub chat model takes Gemini quota from the shared rate limiter
+    (after its cache lookup), unless it was given a limiter of its own.
+    """
+    import src.agents as agents
+    import src.tools as tools
+    from src.resilience import get_limiter
+
+    if llm.rate_limiter is None:
+        llm.rate_limiter = get_limiter("gemini")
+
+    original_llm, original_search = agents.get_llm, tools.get_search_tool
+    agents.get_llm = lambda creative=False: llm
+    tools.get_search_tool = lambda: search
+    try:
+        yield
+    finally:
+        agents.get_llm, tools.get_search_tool = original_llm, original_search
@@ -1,52 +1,95 @@
-from src.graph import build_graph
-from src.models import BattleState, BattleConfig
-import pandas as pd
+import argparse
+import json
+from src.runner import load_niches, run_tournament
+
+DEFAULT_NICHE = "AI Tools for Construction Industry"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="🥊 IdeaForge.AI headless runner: battle many niches in one sweep")
+    parser.add_argument("niches", nargs="*", help="Niches to battle (defaults to a single demo niche)")
+    parser.add_argument("-f", "--niches-file", help="File with one niche per line ('#' for comments)")
+    parser.add_argument("--rounds", type=int, default=2, help="Distinct ideas per niche")
+    parser.add_argument("--iterations", type=int, default=2, help="Refinement loops per idea")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Battles running at the same time (process pool size)")
+    parser.add_argument("--sequential-rounds", action="store_true", help="Run each battle's rounds one after another")
+    parser.add_argument("--no-early-stop", action="store_true", help="Always run every refinement (--iterations exactly, unless a budget runs out)")
+    parser.add_argument("--target-score", type=float, help="Stop refining an idea once it scores at least this")
+    parser.add_argument("--max-llm-calls", type=int, help="Gemini call budget per battle")
+    parser.add_argument("--time-budget", type=float, help="Wall-clock budget per battle, in seconds")
+    parser.add_argument("--halving", action="store_true",
+                        help="Successive-halving tournament per niche: screen a wide pool, fully refine only the best")
+    parser.add_argument("--pool-size", type=int, default=20, help="Candidate ideas per niche (--halving)")
+    parser.add_argument("--keep", type=float, default=0.25, help="Share of ideas advancing each round (--halving)")
+    parser.add_argument("--halving-rounds", type=int, default=3, help="Rounds after the quick screen (--halving)")
+    parser.add_argument("--mode", help="Mode tag stored with each session in the history (default: Spectator, or Tournament with --halving)")
+    parser.add_argument("--report", help="Write per-battle results and the summary as JSON to this path")
+    return parser.parse_args()
 
 def main():
-    print("🥊 IdeaForge.AI: Phase 2 Test")
-    print("=============================")
-    
-    # Configuration
-    niche = "AI Tools for Construction Industry"
-    rounds = 2        # We want 2 distinct ideas
-    iterations = 2    # Each idea gets 1 refine loop (Gen -> Roast -> Refine -> Roast)
-    
-    config = BattleConfig(niche=niche, max_rounds=rounds, max_iterations=iterations)
-    initial_state = BattleState(config=config)
-    
-    # Execution
-    app = build_graph()
-    result = app.invoke(initial_state)
-    
+    args = parse_args()
+    niches = load_niches(args.niches, args.niches_file) or [DEFAULT_NICHE]
+    stopping = {"early_stopping": not args.no_early_stop}
+    for key, value in (("target_score", args.target_score), ("max_llm_calls", args.max_llm_calls),
+                       ("time_budget_s", args.time_budget)):
+        if value is not None:
+            stopping[key] = value
+    halving = None
+    if args.halving:
+        halving = {"pool_size": args.pool_size, "keep_fraction": args.keep, "rounds": args.halving_rounds}
+    mode = args.mode or ("Tournament" if args.halving else "Spectator")
+
+    print("🥊 IdeaForge.AI: Headless Tournament")
+    print("====================================")
+    if halving:
+        print(f"{len(niches)} niche(s) | {args.pool_size} candidates, keep {args.keep:.0%} x {args.halving_rounds} rounds "
+              f"| {args.workers} workers\n")
+    else:
+        print(f"{len(niches)} niche(s) | {args.rounds} rounds x {args.iterations} iterations | {args.workers} workers\n")
+
+    def on_result(result, done, total):
+        if result["ok"]:
+            print(f"[{done}/{total}] ✅ {result['niche']} -> {result['best_title']} "
+                  f"({result['best_score']:.1f}) in {result['latency_s']:.1f}s")
+        else:
+            print(f"[{done}/{total}] ❌ {result['niche']} failed after {result['latency_s']:.1f}s: {result['error']}")
+
+    results, summary = run_tournament(
+        niches,
+        rounds=args.rounds,
+        iterations=args.iterations,
+        workers=args.workers,
+        parallel_rounds=not args.sequential_rounds,
+        mode=mode,
+        on_result=on_result,
+        stopping=stopping,
+        halving=halving
+    )
+
     # ---------------- LEADERBOARD DISPLAY ----------------
-    print("\n🏆 FINAL LEADERBOARD")
-    print("====================")
-    
-    ideas = result['completed_ideas']
-    
-    # Sort by Overall Score (Descending)
-    ideas.sort(key=lambda x: x.score_overall, reverse=True)
-    
-    # Create simple dataframe for view
-    data = []
-    for i, idea in enumerate(ideas):
-        data.append([
-            i+1, 
-            idea.title, 
-            f"{idea.score_overall:.1f}", 
-            idea.score_feasibility, 
-            idea.score_moat, 
-            idea.score_market
-        ])
-        
-    df = pd.DataFrame(data, columns=["Rank", "Title", "Overall", "Feas.", "Moat", "Mkt"])
+    import pandas as pd  # Only the parent needs it, and only at the end
+
+    print("\n🏆 SWEEP RESULTS")
+    print("================")
+
+    rows = [
+        [r["niche"], r.get("session_id"), r.get("best_title") or "-",
+         f"{r['best_score']:.1f}" if r.get("best_score") is not None else "-", f"{r['latency_s']:.1f}"]
+        for r in sorted(results, key=lambda r: r.get("best_score") or 0, reverse=True)
+    ]
+    df = pd.DataFrame(rows, columns=["Niche", "Session", "Best Idea", "Score", "Latency (s)"])
     print(df.to_string(index=False))
-    
-    print("\n📝 Top Idea Details:")
-    top_idea = ideas[0]
-    print(f"Title: {top_idea.title}")
-    print(f"Pitch: {top_idea.description}")
-    print(f"Killer Constraint (Moat): {top_idea.score_moat}/10")
+
+    print("\n⏱️ Throughput")
+    print(f"Battles: {summary['succeeded']}/{summary['battles']} succeeded in {summary['elapsed_s']:.1f}s")
+    print(f"Throughput: {summary['battles_per_minute']:.2f} battles/min")
+    print(f"Latency: p50 {summary['latency_p50_s']:.1f}s | p95 {summary['latency_p95_s']:.1f}s | max {summary['latency_max_s']:.1f}s")
+    if summary["stop_reasons"]:
+        print("Stopped: " + ", ".join(f"{reason} x{count}" for reason, count in sorted(summary["stop_reasons"].items())))
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "results": results}, f, indent=2)
+        print(f"\n📝 Report written to {args.report}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
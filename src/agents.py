@@ -1,120 +1,313 @@
+import contextvars
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.output_parsers import PydanticOutputParser, JsonOutputParser
+from pydantic import ValidationError
 from src.models import BusinessIdea, BattleState
-from src.tools import perform_market_research
-from dotenv import load_dotenv
+from src.tools import (
+    perform_market_research, perform_incremental_research,
+    aperform_market_research, aperform_incremental_research,
+    compact_research
+)
+from src.llm_cache import get_response_cache
+from src.resilience import call_with_retry, acall_with_retry, get_limiter
+from src import tracing
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.config import ensure_config, merge_configs
 
-load_dotenv()
+# The Gemini client (and the google SDK behind it) is created on first use, not at import:
+# importing this module is cheap and does not need GOOGLE_API_KEY.
 
-# Using the model you specified. If this fails, revert to "gemini-1.5-flash"
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7)
+@lru_cache(maxsize=None)
+def get_llm(creative=False):
+    from dotenv import load_dotenv
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    load_dotenv()
+    # Identical prompt + model + temperature -> served from the local response cache
+    # (mode is set with IDEAFORGE_LLM_CACHE: off / read_through / record / replay;
+    # creative steps, generate / refine, skip it under read_through, see src.llm_cache)
+    cache = get_response_cache()
+    if cache is not None and not cache.caches_step(creative):
+        cache = False
+    # Using the model you specified. If this fails, revert to "gemini-1.5-flash"
+    # (max_retries=1: backoff and the circuit breaker live in src.resilience; the shared rate limiter
+    # is applied by the model itself, after the cache lookup, so cache hits don't use quota)
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash", temperature=0.7, cache=cache, max_retries=1,
+        rate_limiter=get_limiter("gemini")
+    )
+
+def __getattr__(name):
+    # Keeps `agents.llm` / `agents.response_cache` working for existing callers (PEP 562)
+    if name == "llm":
+        return get_llm()
+    if name == "response_cache":
+        return get_response_cache()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _llm_config(span):
+    """The inherited run config (LangGraph's stream callbacks, parent run) plus the span's token counter"""
+    return merge_configs(ensure_config(), tracing.llm_callbacks(span))
+
+def invoke_chain(chain, inputs, name="gemini"):
+    """Every Gemini call goes through the shared retry / circuit breaker (traced as one span)"""
+    with tracing.span("llm", name) as span:
+        tracing.record_prompt_inputs(span, inputs)
+        return call_with_retry("gemini", chain.invoke, inputs, config=_llm_config(span))
+
+async def ainvoke_chain(chain, inputs, name="gemini"):
+    with tracing.span("llm", name) as span:
+        tracing.record_prompt_inputs(span, inputs)
+        return await acall_with_retry("gemini", chain.ainvoke, inputs, config=_llm_config(span))
+
+# --- Output format (what we ask the model to return) ---
+# PydanticOutputParser's own instructions embed the full JSON schema of BusinessIdea (~350 tokens,
+# most of it fields we fill in ourselves). The parser still validates the reply; the prompt only
+# lists the keys this step actually needs.
+
+IDEA_FIELDS = ("title", "description", "target_niche")
+ROAST_FIELDS = IDEA_FIELDS + ("score_feasibility", "score_moat", "score_market", "score_overall", "critique")
+# Quick roasts don't echo the idea back (output tokens are the expensive ones)
+SCREEN_FIELDS = ROAST_FIELDS[len(IDEA_FIELDS):]
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number"}
+
+@lru_cache(maxsize=None)
+def compact_format_instructions(fields):
+    keys = []
+    for name in fields:
+        annotation = BusinessIdea.model_fields[name].annotation
+        # Optional[str] -> str
+        base = next((t for t in getattr(annotation, "__args__", (annotation,)) if t is not type(None)), annotation)
+        keys.append(f'"{name}" ({_JSON_TYPES.get(base, "string")})')
+    return f"Reply with a single JSON object with exactly these keys: {', '.join(keys)}."
 
 # ==========================================
 # 1. CORE LOGIC FUNCTIONS (Reusable for Gladiator Mode)
 # ==========================================
 
-def generate_ai_idea_logic(niche, round_id, market_context=""):
-    """Pure logic to generate a fresh AI idea (used by both Graph and Gladiator mode)"""
-    parser = PydanticOutputParser(pydantic_object=BusinessIdea)
+GENERATE_PROMPT = ChatPromptTemplate.from_template(
+    """You are a visionary founder in {niche}.
     
-    # If no context provided, do a quick search (Self-Correction)
-    if not market_context:
-        print(f"--- 🌎 Scouting Trends for {niche} ---")
-        market_context = perform_market_research(f"trending problems in {niche} market 2025")
+    MARKET INTEL:
+    {market_context}
+    
+    Based on this intel, find a specific unsolved problem or gap. 
+    Generate a unique tech business idea to solve it.
+    Do NOT propose generic ideas like "AI Chatbot" unless there is a specific twist.
+    
+    Round: {round}
+    
+    {format_instructions}"""
+)
 
-    prompt = ChatPromptTemplate.from_template(
-        """You are a visionary founder in {niche}.
-        
-        MARKET INTEL:
-        {market_context}
-        
-        Based on this intel, find a specific unsolved problem or gap. 
-        Generate a unique tech business idea to solve it.
-        Do NOT propose generic ideas like "AI Chatbot" unless there is a specific twist.
-        
-        Round: {round}
-        
-        {format_instructions}"""
-    )
-    chain = prompt | llm | parser
-    return chain.invoke({
+REFINE_PROMPT = ChatPromptTemplate.from_template(
+    """Refine this idea based on the critique.
+    
+    Original: {title}
+    Description: {description}
+    Critique: {critique}
+    
+    Pivot or patch the holes. Make it stronger. Keep the Title similar if possible.
+    {format_instructions}"""
+)
+
+def scouting_topic(niche):
+    print(f"--- 🌎 Scouting Trends for {niche} ---")
+    return f"trending problems in {niche} market 2025"
+
+def _generate_inputs(niche, round_id, market_context):
+    return {
         "niche": niche, 
         "round": round_id, 
-        "market_context": market_context,
-        "format_instructions": parser.get_format_instructions()
-    })
+        "market_context": compact_research(market_context, focus=niche),
+        "format_instructions": compact_format_instructions(IDEA_FIELDS)
+    }
 
-def refine_idea_logic(idea):
-    """Pure logic to refine an idea based on critique"""
-    parser = PydanticOutputParser(pydantic_object=BusinessIdea)
-    prompt = ChatPromptTemplate.from_template(
-        """Refine this idea based on the critique.
-        
-        Original: {title}
-        Description: {description}
-        Critique: {critique}
-        
-        Pivot or patch the holes. Make it stronger. Keep the Title similar if possible.
-        {format_instructions}"""
-    )
-    chain = prompt | llm | parser
-    refined_idea = chain.invoke({
+def _refine_inputs(idea):
+    return {
         "title": idea.title, 
         "description": idea.description, 
         "critique": idea.critique,
-        "format_instructions": parser.get_format_instructions()
-    })
-    
-    # Restore metadata that LLM might drop
+        "format_instructions": compact_format_instructions(IDEA_FIELDS)
+    }
+
+def _restore_refine_metadata(refined_idea, idea):
+    """Restore metadata that LLM might drop"""
     refined_idea.round_id = idea.round_id
     refined_idea.iteration_count = idea.iteration_count + 1
     refined_idea.target_niche = idea.target_niche
     return refined_idea
 
-def roast_idea_logic(idea):
-    """Pure logic to score and critique an idea"""
+def generate_ai_idea_logic(niche, round_id, market_context=""):
+    """Pure logic to generate a fresh AI idea (used by both Graph and Gladiator mode)"""
     parser = PydanticOutputParser(pydantic_object=BusinessIdea)
     
-    # Ensure we have market data (if missing, fetch it)
+    # If no context provided, do a quick search (Self-Correction)
+    if not market_context:
+        market_context = perform_market_research(scouting_topic(niche))
+
+    chain = GENERATE_PROMPT | get_llm(creative=True) | parser
+    return invoke_chain(chain, _generate_inputs(niche, round_id, market_context), name="generate")
+
+def refine_idea_logic(idea):
+    """Pure logic to refine an idea based on critique"""
+    parser = PydanticOutputParser(pydantic_object=BusinessIdea)
+    chain = REFINE_PROMPT | get_llm(creative=True) | parser
+    refined_idea = invoke_chain(chain, _refine_inputs(idea), name="refine")
+    return _restore_refine_metadata(refined_idea, idea)
+
+ROAST_PROMPT = ChatPromptTemplate.from_template(
+    """You are a generic VC, but you have access to REAL market data.
+    
+    Idea: {title}
+    Description: {description}
+    
+    REAL WORLD DATA (READ THIS CAREFULLY):
+    {market_data}
+    
+    Task:
+    1. Roast the idea. If data shows strong competitors, be harsh.
+    2. Score 'Market' low if the niche is tiny.
+    3. Be specific. Quote competitors found in data.
+    
+    Score (1-10): Feasibility, Moat, Market.
+    
+    {format_instructions}"""
+)
+
+def _ensure_market_research(idea):
+    """Ensure we have market data (if missing, fetch it)"""
     if not idea.market_research:
         idea.market_research = perform_market_research(f"{idea.target_niche} {idea.title} competitors")
+    return idea
 
-    prompt = ChatPromptTemplate.from_template(
-        """You are a generic VC, but you have access to REAL market data.
-        
-        Idea: {title}
-        Description: {description}
-        
-        REAL WORLD DATA (READ THIS CAREFULLY):
-        {market_data}
-        
-        Task:
-        1. Roast the idea. If data shows strong competitors, be harsh.
-        2. Score 'Market' low if the niche is tiny.
-        3. Be specific. Quote competitors found in data.
-        
-        Score (1-10): Feasibility, Moat, Market.
-        
-        {format_instructions}"""
-    )
-    chain = prompt | llm | parser
-    scored = chain.invoke({
+# Quick (screening) roasts see only this much research and give a one-line critique
+SCREENING_RESEARCH_TOKENS = int(os.getenv("IDEAFORGE_SCREENING_TOKENS", "150"))
+
+def _roast_inputs(idea, quick=False):
+    focus = f"{idea.target_niche} {idea.title} {idea.description}"
+    if quick:
+        market_data = compact_research(idea.market_research, focus=focus, budget=SCREENING_RESEARCH_TOKENS)
+        format_instructions = compact_format_instructions(SCREEN_FIELDS) + ' Keep "critique" to one sentence.'
+    else:
+        market_data = compact_research(idea.market_research, focus=focus)
+        format_instructions = compact_format_instructions(ROAST_FIELDS)
+    return {
         "title": idea.title, 
         "description": idea.description, 
-        "market_data": idea.market_research,
-        "format_instructions": parser.get_format_instructions()
-    })
-    
-    # Restore metadata
+        "market_data": market_data,
+        "format_instructions": format_instructions
+    }
+
+def _restore_roast_metadata(scored, idea):
+    """The LLM only scores; everything else comes from the original idea"""
     scored.market_research = idea.market_research
     scored.target_niche = idea.target_niche
     scored.round_id = idea.round_id
     scored.iteration_count = idea.iteration_count
-    
     return scored
 
+def _screened(scores, idea):
+    """A quick roast only returns scores + critique; everything else is the idea as it was"""
+    if not isinstance(scores, dict):
+        return ValueError(f"Expected a JSON object, got {type(scores).__name__}")
+    try:
+        scored = BusinessIdea.model_validate({**idea.model_dump(), **{k: scores[k] for k in SCREEN_FIELDS if k in scores}})
+    except ValidationError as e:
+        return e
+    return _restore_roast_metadata(scored, idea)
+
+def roast_idea_logic(idea):
+    """Pure logic to score and critique an idea"""
+    parser = PydanticOutputParser(pydantic_object=BusinessIdea)
+    _ensure_market_research(idea)
+    
+    chain = ROAST_PROMPT | get_llm() | parser
+    scored = invoke_chain(chain, _roast_inputs(idea), name="roast")
+    
+    return _restore_roast_metadata(scored, idea)
+
+def roast_ideas_batch(ideas, batch_size=8, max_concurrency=4, quick=False):
+    """Score many ideas through the model in batches (e.g. re-roasting archived sessions).
+
+    Results come back in the same order as `ideas`. A failure only affects its own slot:
+    that position holds the Exception instead of a scored BusinessIdea.
+    quick=True is the cheap first-pass screen (trimmed research, scores + one-line critique only).
+    """
+    parser = JsonOutputParser() if quick else PydanticOutputParser(pydantic_object=BusinessIdea)
+    chain = ROAST_PROMPT | get_llm() | parser
+    name = "roast_screen" if quick else "roast_batch"
+    resilient_chain = RunnableLambda(lambda inputs: invoke_chain(chain, inputs, name=name))
+    
+    # 1. Fill in missing research (bounded, and also isolated per idea)
+    research_errors = {}
+    missing = [i for i, idea in enumerate(ideas) if not idea.market_research]
+    if missing:
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="batch-research") as pool:
+            futures = {i: pool.submit(contextvars.copy_context().run, _ensure_market_research, ideas[i]) for i in missing}
+            for i, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    research_errors[i] = e
+    
+    # 2. Score everything that has research, batch by batch
+    results = [None] * len(ideas)
+    for i, err in research_errors.items():
+        results[i] = err
+    pending = [i for i in range(len(ideas)) if i not in research_errors]
+    
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        outputs = resilient_chain.batch(
+            [_roast_inputs(ideas[i], quick=quick) for i in chunk],
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True
+        )
+        for i, output in zip(chunk, outputs):
+            if isinstance(output, Exception):
+                results[i] = output
+            elif quick:
+                results[i] = _screened(output, ideas[i])
+            else:
+                results[i] = _restore_roast_metadata(output, ideas[i])
+    
+    return results
+
+# ==========================================
+# 1b. ASYNC LOGIC (Same prompts, for ainvoke / shared event loops)
+# ==========================================
+
+async def agenerate_ai_idea_logic(niche, round_id, market_context=""):
+    """Async twin of generate_ai_idea_logic"""
+    parser = PydanticOutputParser(pydantic_object=BusinessIdea)
+    if not market_context:
+        market_context = await aperform_market_research(scouting_topic(niche))
+
+    chain = GENERATE_PROMPT | get_llm(creative=True) | parser
+    return await ainvoke_chain(chain, _generate_inputs(niche, round_id, market_context), name="generate")
+
+async def arefine_idea_logic(idea):
+    """Async twin of refine_idea_logic"""
+    parser = PydanticOutputParser(pydantic_object=BusinessIdea)
+    chain = REFINE_PROMPT | get_llm(creative=True) | parser
+    refined_idea = await ainvoke_chain(chain, _refine_inputs(idea), name="refine")
+    return _restore_refine_metadata(refined_idea, idea)
+
+async def aroast_idea_logic(idea):
+    """Async twin of roast_idea_logic"""
+    parser = PydanticOutputParser(pydantic_object=BusinessIdea)
+    if not idea.market_research:
+        idea.market_research = await aperform_market_research(f"{idea.target_niche} {idea.title} competitors")
+
+    chain = ROAST_PROMPT | get_llm() | parser
+    scored = await ainvoke_chain(chain, _roast_inputs(idea), name="roast")
+    return _restore_roast_metadata(scored, idea)
+
 # ==========================================
 # 2. GRAPH NODES (Used in Simulation Mode)
 # ==========================================
@@ -135,11 +328,14 @@ def generate_node(state: BattleState):
         print(f"--- 🔧 Refining Idea (Iter {state.current_iteration}) ---")
         new_idea = refine_idea_logic(current_idea)
 
+    return _generated_update(state, new_idea)
+
+def _generated_update(state: BattleState, new_idea):
     # Metadata updates
     new_iteration_count = state.current_iteration + 1  # FIX: Increment counter
     new_idea.round_id = state.current_round
     new_idea.iteration_count = new_iteration_count
-    new_idea.target_niche = config.niche
+    new_idea.target_niche = state.config.niche
     
     # --- CRITICAL FIX: Return updated iteration count to State ---
     return {
@@ -147,12 +343,24 @@ def generate_node(state: BattleState):
         "current_iteration": new_iteration_count 
     }
 
+def previous_research(state: BattleState):
+    """Research gathered by the last roasted iteration of the current round, if any"""
+    for past_idea in reversed(state.all_iterations):
+        if past_idea.round_id == state.current_round:
+            return past_idea.market_research
+    return ""
+
 def research_node(state: BattleState):
     idea = state.current_idea
     print(f"--- 🕵️ Researching Market for: {idea.title} ---")
     
-    # 1. Search the web
-    research_data = perform_market_research(idea.target_niche + " " + idea.title)
+    # 1. Search the web (refinements only fetch what is new since the last iteration)
+    topic = idea.target_niche + " " + idea.title
+    previous = previous_research(state)
+    if previous:
+        research_data = perform_incremental_research(topic, previous)
+    else:
+        research_data = perform_market_research(topic)
     
     # 2. Update the idea object with facts
     idea.market_research = research_data
@@ -164,4 +372,35 @@ def roast_node(state: BattleState):
     # Call shared logic
     scored_idea = roast_idea_logic(state.current_idea)
     
-    return {"current_idea": scored_idea}
\ No newline at end of file
+    return {"current_idea": scored_idea}
+
+# --- Async nodes (used when the graph is driven with ainvoke / astream) ---
+
+async def agenerate_node(state: BattleState):
+    if state.current_iteration == 0:
+        print(f"--- 💡 Generating grounded idea (Round {state.current_round})... ---")
+        new_idea = await agenerate_ai_idea_logic(state.config.niche, state.current_round)
+    else:
+        print(f"--- 🔧 Refining Idea (Iter {state.current_iteration}) ---")
+        new_idea = await arefine_idea_logic(state.current_idea)
+
+    return _generated_update(state, new_idea)
+
+async def aresearch_node(state: BattleState):
+    idea = state.current_idea
+    print(f"--- 🕵️ Researching Market for: {idea.title} ---")
+
+    topic = idea.target_niche + " " + idea.title
+    previous = previous_research(state)
+    if previous:
+        idea.market_research = await aperform_incremental_research(topic, previous)
+    else:
+        idea.market_research = await aperform_market_research(topic)
+
+    return {"current_idea": idea}
+
+async def aroast_node(state: BattleState):
+    print("--- 🔥 Roasting with Facts ---")
+    scored_idea = await aroast_idea_logic(state.current_idea)
+
+    return {"current_idea": scored_idea}
@@ -0,0 +1,41 @@
+import os
+import sqlite3
+import threading
+import uuid
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+from src.database import DB_NAME
+
+# Graph state after every node, so an interrupted battle resumes instead of starting over
+CHECKPOINT_DB_NAME = os.path.join(os.path.dirname(DB_NAME), "checkpoints.db")
+
+# Our state models are the only custom types stored in checkpoints
+CHECKPOINT_TYPES = [
+    ("src.models", "BattleConfig"),
+    ("src.models", "BattleState"),
+    ("src.models", "BusinessIdea"),
+]
+
+_checkpointer = None
+_lock = threading.Lock()
+
+def get_checkpointer():
+    """Process-wide SqliteSaver (it serialises access to its connection itself)"""
+    global _checkpointer
+    with _lock:
+        if _checkpointer is None:
+            conn = sqlite3.connect(CHECKPOINT_DB_NAME, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            _checkpointer = SqliteSaver(conn, serde=JsonPlusSerializer(allowed_msgpack_modules=CHECKPOINT_TYPES))
+        return _checkpointer
+
+def new_thread_id():
+    return f"battle-{uuid.uuid4().hex[:12]}"
+
+def has_checkpoint(thread_id):
+    return get_checkpointer().get_tuple({"configurable": {"thread_id": thread_id}}) is not None
+
+def pending_nodes(app, thread_id):
+    """Nodes that will run next when the battle resumes (empty once it has finished)"""
+    snapshot = app.get_state({"configurable": {"thread_id": thread_id}})
+    return list(snapshot.next)
@@ -1,92 +1,612 @@
 import sqlite3
 import json
-from datetime import datetime
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from src.models import BusinessIdea
 
 DB_NAME = "ideaforge.db"
 
-def init_db():
-    """Create tables if they don't exist"""
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    
+# ==========================================
+# CONNECTION MANAGEMENT
+# ==========================================
+# sqlite3 connections must stay on the thread that created them, so we keep one per thread
+# (Streamlit runs every rerun on a new script thread, so each rerun opens its own).
+# They must not cross a fork either: a process-pool worker inherits the parent's thread-local,
+# so connections are tagged with the pid that opened them and reopened in a child process.
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized_paths = set()
+
+def get_connection():
+    """The calling thread's connection to DB_NAME (WAL mode, opened on first use in this thread and process)"""
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != DB_NAME or _local.pid != os.getpid():
+        conn = sqlite3.connect(DB_NAME, timeout=30)
+        # WAL: readers (history browsing) no longer block on writers (saves) and vice versa
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        _local.conn = conn
+        _local.path = DB_NAME
+        _local.pid = os.getpid()
+    return conn
+
+@contextmanager
+def transaction():
+    """Commit on success, roll back on error"""
+    conn = get_connection()
+    with conn:
+        yield conn
+
+# ==========================================
+# SCHEMA MIGRATIONS (tracked in PRAGMA user_version)
+# ==========================================
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+def _migration_1_base_tables(conn):
     # Table 1: Sessions (The Battle Event)
     # Added 'mode' column to track Spectator vs Gladiator
-    c.execute('''CREATE TABLE IF NOT EXISTS sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    niche TEXT,
-                    mode TEXT, 
-                    timestamp TEXT
-                )''')
-    
+    conn.execute('''CREATE TABLE IF NOT EXISTS sessions (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        niche TEXT,
+                        mode TEXT,
+                        timestamp TEXT
+                    )''')
+
     # Table 2: Ideas (The Output)
-    c.execute('''CREATE TABLE IF NOT EXISTS ideas (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id INTEGER,
-                    title TEXT,
-                    overall_score REAL,
-                    full_data JSON,
-                    FOREIGN KEY(session_id) REFERENCES sessions(id)
-                )''')
-    
-    conn.commit()
-    conn.close()
+    conn.execute('''CREATE TABLE IF NOT EXISTS ideas (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        session_id INTEGER,
+                        title TEXT,
+                        overall_score REAL,
+                        full_data JSON,
+                        FOREIGN KEY(session_id) REFERENCES sessions(id)
+                    )''')
 
-def save_battle(niche: str, ideas: list[BusinessIdea], mode: str = "Spectator"):
-    """Save a finished battle with its specific mode"""
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    
-    # Check if 'mode' column exists (Migration logic for existing DBs)
+    # Databases created before the 'mode' column existed
+    if "mode" not in _columns(conn, "sessions"):
+        conn.execute("ALTER TABLE sessions ADD COLUMN mode TEXT")
+
+def _migration_2_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ideas_session ON ideas(session_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_mode_id ON sessions(mode, id)")
+
+# Light, frequently read fields get real columns; research / critique stay in full_data only
+SCORE_COLUMNS = {
+    "description": "TEXT",
+    "score_feasibility": "INTEGER",
+    "score_moat": "INTEGER",
+    "score_market": "INTEGER",
+    "round_id": "INTEGER",
+    "iteration_count": "INTEGER",
+}
+
+def _migration_3_score_columns(conn):
+    existing = _columns(conn, "ideas")
+    for column, column_type in SCORE_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE ideas ADD COLUMN {column} {column_type}")
+
+    # Backfill old rows straight from the JSON blob
+    conn.execute('''UPDATE ideas SET
+                        description = json_extract(full_data, '$.description'),
+                        score_feasibility = json_extract(full_data, '$.score_feasibility'),
+                        score_moat = json_extract(full_data, '$.score_moat'),
+                        score_market = json_extract(full_data, '$.score_market'),
+                        round_id = json_extract(full_data, '$.round_id'),
+                        iteration_count = json_extract(full_data, '$.iteration_count')
+                    WHERE full_data IS NOT NULL''')
+
+def _migration_4_history_index(conn):
+    # Keyset pagination walks (timestamp, id) backwards inside one mode
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_mode_time_id ON sessions(mode, timestamp, id)")
+
+def fts_available(conn) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'ideas_fts'").fetchone() is not None
+
+def _migration_5_full_text_search(conn):
+    # rowid of ideas_fts == ideas.id
     try:
-        c.execute("SELECT mode FROM sessions LIMIT 1")
+        conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS ideas_fts USING fts5(
+                            title, description, critique, market_research,
+                            tokenize = 'porter unicode61'
+                        )''')
     except sqlite3.OperationalError:
-        # If column doesn't exist, add it
-        c.execute("ALTER TABLE sessions ADD COLUMN mode TEXT")
-    
-    # 1. Create Session
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    c.execute("INSERT INTO sessions (niche, mode, timestamp) VALUES (?, ?, ?)", (niche, mode, timestamp))
-    session_id = c.lastrowid
-    
-    # 2. Save Each Idea
-    for idea in ideas:
-        idea_json = idea.model_dump_json()
-        c.execute('''INSERT INTO ideas (session_id, title, overall_score, full_data)
-                     VALUES (?, ?, ?, ?)''', 
-                     (session_id, idea.title, idea.score_overall, idea_json))
-        
-    conn.commit()
-    conn.close()
+        # SQLite built without FTS5 -> search_ideas falls back to LIKE
+        return
+
+    conn.execute('''INSERT INTO ideas_fts (rowid, title, description, critique, market_research)
+                    SELECT id, title,
+                           json_extract(full_data, '$.description'),
+                           json_extract(full_data, '$.critique'),
+                           json_extract(full_data, '$.market_research')
+                    FROM ideas WHERE id NOT IN (SELECT rowid FROM ideas_fts)''')
+
+ALL_NICHES = "*"      # Aggregate row covering every niche of a mode
+TOP_N_PER_NICHE = 10
+
+def _migration_6_aggregates(conn):
+    # Running sums per (niche, mode): averages / std-devs come out in O(1)
+    conn.execute('''CREATE TABLE IF NOT EXISTS niche_stats (
+                        niche TEXT,
+                        mode TEXT,
+                        session_count INTEGER DEFAULT 0,
+                        idea_count INTEGER DEFAULT 0,
+                        score_sum REAL DEFAULT 0,
+                        score_sq_sum REAL DEFAULT 0,
+                        feasibility_sum REAL DEFAULT 0,
+                        moat_sum REAL DEFAULT 0,
+                        market_sum REAL DEFAULT 0,
+                        best_score REAL,
+                        PRIMARY KEY (niche, mode)
+                    )''')
+    # Overall score distribution, one row per integer bucket 0-10
+    conn.execute('''CREATE TABLE IF NOT EXISTS score_histogram (
+                        niche TEXT,
+                        mode TEXT,
+                        bucket INTEGER,
+                        idea_count INTEGER DEFAULT 0,
+                        PRIMARY KEY (niche, mode, bucket)
+                    )''')
+    # Best TOP_N_PER_NICHE ideas ever, per (niche, mode)
+    conn.execute('''CREATE TABLE IF NOT EXISTS top_ideas (
+                        niche TEXT,
+                        mode TEXT,
+                        idea_id INTEGER,
+                        session_id INTEGER,
+                        title TEXT,
+                        score_overall REAL,
+                        PRIMARY KEY (niche, mode, idea_id)
+                    )''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_top_ideas_rank ON top_ideas(niche, mode, score_overall DESC)")
+
+    # Backfill from existing battles
+    rows = conn.execute('''SELECT i.id, i.session_id, s.niche, COALESCE(s.mode, 'Legacy'), i.title,
+                                  i.overall_score, i.score_feasibility, i.score_moat, i.score_market
+                           FROM ideas i JOIN sessions s ON s.id = i.session_id
+                           ORDER BY i.session_id''').fetchall()
+    by_session = {}
+    for row in rows:
+        by_session.setdefault((row[1], row[2], row[3]), []).append(row)
+    for (session_id, niche, mode), session_rows in by_session.items():
+        _update_aggregates(conn, session_id, niche, mode, [
+            {"id": r[0], "title": r[4], "score_overall": r[5] or 0.0,
+             "score_feasibility": r[6] or 0, "score_moat": r[7] or 0, "score_market": r[8] or 0}
+            for r in session_rows
+        ])
+
+def _update_aggregates(conn, session_id, niche, mode, ideas):
+    """Fold one saved battle into the aggregate tables (called inside save_battle's transaction)"""
+    if not ideas:
+        return
+    niche = (niche or "").strip()
+    scores = [idea["score_overall"] for idea in ideas]
+
+    for key_niche in (niche, ALL_NICHES):
+        conn.execute('''INSERT INTO niche_stats (niche, mode, session_count, idea_count, score_sum, score_sq_sum,
+                                                 feasibility_sum, moat_sum, market_sum, best_score)
+                        VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(niche, mode) DO UPDATE SET
+                            session_count = session_count + 1,
+                            idea_count = idea_count + excluded.idea_count,
+                            score_sum = score_sum + excluded.score_sum,
+                            score_sq_sum = score_sq_sum + excluded.score_sq_sum,
+                            feasibility_sum = feasibility_sum + excluded.feasibility_sum,
+                            moat_sum = moat_sum + excluded.moat_sum,
+                            market_sum = market_sum + excluded.market_sum,
+                            best_score = MAX(COALESCE(best_score, excluded.best_score), excluded.best_score)''',
+                     (key_niche, mode, len(ideas), sum(scores), sum(x * x for x in scores),
+                      sum(i["score_feasibility"] for i in ideas), sum(i["score_moat"] for i in ideas),
+                      sum(i["score_market"] for i in ideas), max(scores)))
+
+        for idea in ideas:
+            bucket = max(0, min(10, int(idea["score_overall"])))
+            conn.execute('''INSERT INTO score_histogram (niche, mode, bucket, idea_count) VALUES (?, ?, ?, 1)
+                            ON CONFLICT(niche, mode, bucket) DO UPDATE SET idea_count = idea_count + 1''',
+                         (key_niche, mode, bucket))
+            conn.execute('''INSERT INTO top_ideas (niche, mode, idea_id, session_id, title, score_overall)
+                            VALUES (?, ?, ?, ?, ?, ?)''',
+                         (key_niche, mode, idea["id"], session_id, idea["title"], idea["score_overall"]))
+
+        # Keep only the best N (the index makes this a short range scan)
+        conn.execute('''DELETE FROM top_ideas WHERE niche = ? AND mode = ? AND idea_id NOT IN (
+                            SELECT idea_id FROM top_ideas WHERE niche = ? AND mode = ?
+                            ORDER BY score_overall DESC, idea_id DESC LIMIT ?
+                        )''', (key_niche, mode, key_niche, mode, TOP_N_PER_NICHE))
+
+def _migration_7_battle_runs(conn):
+    # One row per graph run (thread_id = LangGraph checkpoint thread), so unfinished battles can be resumed
+    conn.execute('''CREATE TABLE IF NOT EXISTS battle_runs (
+                        thread_id TEXT PRIMARY KEY,
+                        niche TEXT,
+                        mode TEXT,
+                        config_json JSON,
+                        status TEXT,
+                        error TEXT,
+                        session_id INTEGER,
+                        created_at TEXT,
+                        updated_at TEXT
+                    )''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_battle_runs_status ON battle_runs(mode, status, created_at)")
+
+def _migration_8_iterations(conn):
+    # Every roasted iteration, written as soon as it exists (not just the final idea per round)
+    conn.execute('''CREATE TABLE IF NOT EXISTS iterations (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        run_id TEXT,
+                        round_id INTEGER,
+                        iteration_count INTEGER,
+                        title TEXT,
+                        overall_score REAL,
+                        score_feasibility INTEGER,
+                        score_moat INTEGER,
+                        score_market INTEGER,
+                        full_data JSON,
+                        created_at TEXT,
+                        UNIQUE (run_id, round_id, iteration_count)
+                    )''')
+
+# Tables whose writes invalidate cached reads in the UI (see get_change_counter)
+CHANGE_TRACKED_TABLES = ("sessions", "ideas", "battle_runs")
+
+def _migration_9_change_counter(conn):
+    # Bumped by triggers, so writes from any process (app, headless runner) are seen
+    conn.execute("CREATE TABLE IF NOT EXISTS change_counter (id INTEGER PRIMARY KEY CHECK (id = 1), value INTEGER)")
+    conn.execute("INSERT OR IGNORE INTO change_counter (id, value) VALUES (1, 0)")
+    for table in CHANGE_TRACKED_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_changes AFTER {event} ON {table}
+                             BEGIN UPDATE change_counter SET value = value + 1 WHERE id = 1; END''')
+
+MIGRATIONS = [
+    _migration_1_base_tables,
+    _migration_2_indexes,
+    _migration_3_score_columns,
+    _migration_4_history_index,
+    _migration_5_full_text_search,
+    _migration_6_aggregates,
+    _migration_7_battle_runs,
+    _migration_8_iterations,
+    _migration_9_change_counter,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def init_db():
+    """Create / upgrade the schema. Runs pending migrations once; later calls are free."""
+    if DB_NAME in _initialized_paths:
+        return
+
+    with _init_lock:
+        if DB_NAME in _initialized_paths:
+            return
+
+        conn = get_connection()
+        current_version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, migration in enumerate(MIGRATIONS, start=1):
+            if version > current_version:
+                with conn:
+                    migration(conn)
+                    conn.execute(f"PRAGMA user_version = {version}")
+        _initialized_paths.add(DB_NAME)
+
+def get_change_counter() -> int:
+    """Grows with every write to the history tables; use it as a cache key for reads"""
+    init_db()
+    return get_connection().execute("SELECT value FROM change_counter WHERE id = 1").fetchone()[0]
+
+# ==========================================
+# BATTLES
+# ==========================================
+
+def save_battle(niche: str, ideas: list[BusinessIdea], mode: str = "Spectator"):
+    """Save a finished battle with its specific mode"""
+    init_db()
+
+    with transaction() as conn:
+        # 1. Create Session
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        c = conn.execute("INSERT INTO sessions (niche, mode, timestamp) VALUES (?, ?, ?)", (niche, mode, timestamp))
+        session_id = c.lastrowid
+
+        # 2. Save Each Idea (and keep the search index in sync, same transaction)
+        index_search = fts_available(conn)
+        saved = []
+        for idea in ideas:
+            c = conn.execute('''INSERT INTO ideas (session_id, title, overall_score, full_data,
+                                                 description, score_feasibility, score_moat, score_market,
+                                                 round_id, iteration_count)
+                               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                            (session_id, idea.title, idea.score_overall, idea.model_dump_json(),
+                             idea.description, idea.score_feasibility, idea.score_moat, idea.score_market,
+                             idea.round_id, idea.iteration_count))
+            if index_search:
+                conn.execute('''INSERT INTO ideas_fts (rowid, title, description, critique, market_research)
+                                VALUES (?, ?, ?, ?, ?)''',
+                             (c.lastrowid, idea.title, idea.description, idea.critique, idea.market_research))
+            saved.append({"id": c.lastrowid, **idea.model_dump(include={
+                "title", "score_overall", "score_feasibility", "score_moat", "score_market"
+            })})
+
+        # 3. Cross-session leaderboards / niche aggregates, updated incrementally
+        _update_aggregates(conn, session_id, niche, mode, saved)
+
     return session_id
 
 def get_sessions_by_mode(mode_filter: str):
     """Get battles filtered by their mode"""
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    
-    # Migration check (in case DB is old)
-    try:
-        c.execute("SELECT mode FROM sessions LIMIT 1")
-    except sqlite3.OperationalError:
-        return [] # Return empty if DB structure isn't updated yet
+    init_db()
+    conn = get_connection()
+    return conn.execute(
+        "SELECT id, niche, timestamp FROM sessions WHERE mode = ? ORDER BY id DESC", (mode_filter,)
+    ).fetchall()
+
+HISTORY_PAGE_SIZE = 20
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def get_sessions_page(mode_filter: str, cursor=None, limit: int = HISTORY_PAGE_SIZE, niche_prefix: str = ""):
+    """One page of history, newest first, using keyset pagination.
+
+    `cursor` is the (timestamp, id) of the last row already shown (None for the first page).
+    Returns (rows, next_cursor); next_cursor is None when there is nothing older.
+    """
+    init_db()
+    conn = get_connection()
+
+    query = "SELECT id, niche, timestamp FROM sessions WHERE mode = ?"
+    params = [mode_filter]
+    if niche_prefix:
+        query += " AND niche LIKE ? ESCAPE '\\'"
+        params.append(_escape_like(niche_prefix.strip()) + "%")
+    if cursor is not None:
+        query += " AND (timestamp, id) < (?, ?)"
+        params.extend(cursor)
+    query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    params.append(limit + 1)  # One extra row tells us whether another page exists
 
-    c.execute("SELECT id, niche, timestamp FROM sessions WHERE mode = ? ORDER BY id DESC", (mode_filter,))
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    rows = conn.execute(query, params).fetchall()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_id, _, last_time = rows[-1]
+        return rows, (last_time, last_id)
+    return rows, None
+
+def get_sessions_range(mode_filter: str, after, until, niche_prefix: str = ""):
+    """History rows older than the `after` cursor, down to and including the `until` cursor, newest first.
+
+    Re-reads pages the user has already loaded, so rows pushed off the first page by new battles are not lost.
+    """
+    init_db()
+    conn = get_connection()
+
+    query = "SELECT id, niche, timestamp FROM sessions WHERE mode = ?"
+    params = [mode_filter]
+    if niche_prefix:
+        query += " AND niche LIKE ? ESCAPE '\\'"
+        params.append(_escape_like(niche_prefix.strip()) + "%")
+    query += " AND (timestamp, id) < (?, ?) AND (timestamp, id) >= (?, ?) ORDER BY timestamp DESC, id DESC"
+    params.extend(after)
+    params.extend(until)
+    return conn.execute(query, params).fetchall()
+
+def get_session_leaderboard(session_id):
+    """Lightweight rows for the history table (columns only, no JSON parsing), best first"""
+    init_db()
+    conn = get_connection()
+    rows = conn.execute('''SELECT id, title, description, overall_score, score_feasibility,
+                                      score_moat, score_market, round_id, iteration_count
+                               FROM ideas WHERE session_id = ?
+                               ORDER BY overall_score DESC, id''', (session_id,)).fetchall()
+    keys = ["id", "title", "description", "score_overall", "score_feasibility",
+            "score_moat", "score_market", "round_id", "iteration_count"]
+    return [dict(zip(keys, row)) for row in rows]
+
+def get_idea_details(idea_id):
+    """The heavy text fields of one idea, loaded on demand"""
+    init_db()
+    conn = get_connection()
+    row = conn.execute('''SELECT json_extract(full_data, '$.market_research'),
+                                  json_extract(full_data, '$.critique')
+                           FROM ideas WHERE id = ?''', (idea_id,)).fetchone()
+    if row is None:
+        return None
+    return {"market_research": row[0], "critique": row[1]}
 
 def get_session_ideas(session_id):
-    """Retrieve all ideas for a specific battle"""
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT full_data FROM ideas WHERE session_id = ?", (session_id,))
-    rows = c.fetchall()
-    conn.close()
-    
+    """Retrieve all ideas for a specific battle (full objects, e.g. for the CSV report)"""
+    init_db()
+    conn = get_connection()
+    rows = conn.execute("SELECT full_data FROM ideas WHERE session_id = ?", (session_id,)).fetchall()
+
     restored_ideas = []
     for row in rows:
         data = json.loads(row[0])
         restored_ideas.append(BusinessIdea(**data))
-        
-    return restored_ideas
\ No newline at end of file
+
+    return restored_ideas
+
+# ==========================================
+# SEARCH (FTS5 over titles, pitches, critiques and research)
+# ==========================================
+
+def _fts_query(text: str) -> str:
+    """User text -> safe FTS5 query: every word must match, the last one as a prefix"""
+    words = re.findall(r"\w+", text)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+def search_ideas(text: str, limit: int = 20, mode_filter: str = None):
+    """Best matching archived ideas first (bm25, title hits weigh most)"""
+    init_db()
+    conn = get_connection()
+    query = _fts_query(text)
+    if not query:
+        return []
+
+    keys = ["id", "session_id", "niche", "mode", "title", "score_overall", "snippet"]
+    mode_clause = " AND s.mode = ?" if mode_filter else ""
+
+    if fts_available(conn):
+        params = [query] + ([mode_filter] if mode_filter else []) + [limit]
+        rows = conn.execute(f'''SELECT i.id, i.session_id, s.niche, s.mode, i.title, i.overall_score,
+                                        snippet(ideas_fts, -1, '**', '**', '…', 12)
+                                 FROM ideas_fts
+                                 JOIN ideas i ON i.id = ideas_fts.rowid
+                                 JOIN sessions s ON s.id = i.session_id
+                                 WHERE ideas_fts MATCH ?{mode_clause}
+                                 ORDER BY bm25(ideas_fts, 10.0, 4.0, 2.0, 1.0)
+                                 LIMIT ?''', params).fetchall()
+    else:
+        # No FTS5 in this SQLite build: slow but correct substring match on the light columns
+        like = "%" + _escape_like(text.strip()) + "%"
+        params = [like, like] + ([mode_filter] if mode_filter else []) + [limit]
+        rows = conn.execute(f'''SELECT i.id, i.session_id, s.niche, s.mode, i.title, i.overall_score,
+                                        substr(i.description, 1, 120)
+                                 FROM ideas i JOIN sessions s ON s.id = i.session_id
+                                 WHERE (i.title LIKE ? ESCAPE '\\' OR i.description LIKE ? ESCAPE '\\'){mode_clause}
+                                 ORDER BY i.overall_score DESC
+                                 LIMIT ?''', params).fetchall()
+
+    return [dict(zip(keys, row)) for row in rows]
+
+# ==========================================
+# LEADERBOARDS (read straight from the aggregate tables)
+# ==========================================
+
+def get_stat_modes():
+    init_db()
+    conn = get_connection()
+    return [row[0] for row in conn.execute("SELECT DISTINCT mode FROM niche_stats WHERE niche = ?", (ALL_NICHES,))]
+
+def get_niche_stats(mode_filter: str, limit: int = 50):
+    """Per-niche summary for a mode, busiest niches first (the '*' row is the whole mode)"""
+    init_db()
+    conn = get_connection()
+    rows = conn.execute('''SELECT niche, session_count, idea_count, score_sum, score_sq_sum,
+                                  feasibility_sum, moat_sum, market_sum, best_score
+                           FROM niche_stats WHERE mode = ?
+                           ORDER BY niche = ? DESC, idea_count DESC LIMIT ?''',
+                        (mode_filter, ALL_NICHES, limit)).fetchall()
+    stats = []
+    for niche, sessions, count, total, sq_total, feas, moat, market, best in rows:
+        mean = total / count if count else 0.0
+        variance = max(0.0, sq_total / count - mean * mean) if count else 0.0
+        stats.append({
+            "niche": niche,
+            "sessions": sessions,
+            "ideas": count,
+            "avg_score": mean,
+            "std_score": variance ** 0.5,
+            "avg_feasibility": feas / count if count else 0.0,
+            "avg_moat": moat / count if count else 0.0,
+            "avg_market": market / count if count else 0.0,
+            "best_score": best,
+        })
+    return stats
+
+def get_top_ideas(niche: str, mode_filter: str, limit: int = TOP_N_PER_NICHE):
+    init_db()
+    conn = get_connection()
+    rows = conn.execute('''SELECT idea_id, session_id, title, score_overall FROM top_ideas
+                           WHERE niche = ? AND mode = ?
+                           ORDER BY score_overall DESC, idea_id DESC LIMIT ?''',
+                        (niche, mode_filter, limit)).fetchall()
+    return [dict(zip(["id", "session_id", "title", "score_overall"], row)) for row in rows]
+
+def get_score_histogram(niche: str, mode_filter: str):
+    """{bucket (0-10): idea count}"""
+    init_db()
+    conn = get_connection()
+    rows = conn.execute("SELECT bucket, idea_count FROM score_histogram WHERE niche = ? AND mode = ? ORDER BY bucket",
+                        (niche, mode_filter)).fetchall()
+    return dict(rows)
+
+# ==========================================
+# BATTLE RUNS (checkpointed, resumable graph executions)
+# ==========================================
+
+# A 'running' run is only offered for resume once its heartbeat (updated_at) is this old:
+# until then another tab, session or process may still be driving the same checkpoint.
+RUN_STALE_SECONDS = int(os.getenv("IDEAFORGE_RUN_STALE_SECONDS", "600"))
+# save_iteration refreshes the heartbeat at most this often (each refresh invalidates the UI's query cache)
+RUN_HEARTBEAT_SECONDS = 60
+
+def _now(seconds_ago=0):
+    return (datetime.now() - timedelta(seconds=seconds_ago)).strftime("%Y-%m-%d %H:%M:%S")
+
+def start_battle_run(thread_id: str, niche: str, config_json: str, mode: str = "Spectator"):
+    init_db()
+    with transaction() as conn:
+        conn.execute('''INSERT OR REPLACE INTO battle_runs (thread_id, niche, mode, config_json, status, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, 'running', ?, ?)''', (thread_id, niche, mode, config_json, _now(), _now()))
+
+def mark_battle_run(thread_id: str, status: str, error: str = None, session_id: int = None):
+    """status: running / failed / finished"""
+    init_db()
+    with transaction() as conn:
+        conn.execute('''UPDATE battle_runs SET status = ?, error = ?, session_id = COALESCE(?, session_id), updated_at = ?
+                        WHERE thread_id = ?''', (status, error, session_id, _now(), thread_id))
+
+def claim_battle_run(thread_id: str) -> bool:
+    """Marks an unfinished run as running again before a resume -> False if it is still live elsewhere"""
+    init_db()
+    with transaction() as conn:
+        cursor = conn.execute('''UPDATE battle_runs SET status = 'running', error = NULL, updated_at = ?
+                                 WHERE thread_id = ? AND status != 'finished'
+                                   AND NOT (status = 'running' AND updated_at >= ?)''',
+                              (_now(), thread_id, _now(RUN_STALE_SECONDS)))
+        return cursor.rowcount == 1
+
+def is_live_run(run: dict) -> bool:
+    """True for a 'running' row (from get_unfinished_battles) whose heartbeat is still recent"""
+    return run["status"] == "running" and run["updated_at"] >= _now(RUN_STALE_SECONDS)
+
+def get_unfinished_battles(mode_filter: str, limit: int = 10):
+    """Runs that never reached save_battle (failed, still running, or the process died mid-run), newest first.
+
+    Runs still being driven elsewhere are included: check is_live_run before offering a resume.
+    """
+    init_db()
+    conn = get_connection()
+    rows = conn.execute('''SELECT thread_id, niche, config_json, status, error, updated_at FROM battle_runs
+                           WHERE mode = ? AND status != 'finished'
+                           ORDER BY created_at DESC LIMIT ?''', (mode_filter, limit)).fetchall()
+    return [dict(zip(["thread_id", "niche", "config_json", "status", "error", "updated_at"], row)) for row in rows]
+
+# ==========================================
+# ITERATIONS (full refinement trajectory, persisted as it happens)
+# ==========================================
+
+def save_iteration(run_id: str, idea: BusinessIdea):
+    """Persist one roasted iteration right away (re-running the same step overwrites it) and refresh the run's heartbeat"""
+    init_db()
+    with transaction() as conn:
+        conn.execute('''INSERT OR REPLACE INTO iterations (run_id, round_id, iteration_count, title, overall_score,
+                                                         score_feasibility, score_moat, score_market, full_data, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                     (run_id, idea.round_id, idea.iteration_count, idea.title, idea.score_overall,
+                      idea.score_feasibility, idea.score_moat, idea.score_market, idea.model_dump_json(), _now()))
+        conn.execute('''UPDATE battle_runs SET updated_at = ?
+                        WHERE thread_id = ? AND status = 'running' AND updated_at < ?''',
+                     (_now(), run_id, _now(RUN_HEARTBEAT_SECONDS)))
+
+def get_session_iterations(session_id):
+    """Score trajectory of a saved battle (columns only), in round / iteration order"""
+    init_db()
+    conn = get_connection()
+    rows = conn.execute('''SELECT it.round_id, it.iteration_count, it.title, it.overall_score,
+                                  it.score_feasibility, it.score_moat, it.score_market
+                           FROM iterations it JOIN battle_runs r ON r.thread_id = it.run_id
+                           WHERE r.session_id = ?
+                           ORDER BY it.round_id, it.iteration_count''', (session_id,)).fetchall()
+    keys = ["round_id", "iteration_count", "title", "score_overall", "score_feasibility", "score_moat", "score_market"]
+    return [dict(zip(keys, row)) for row in rows]
@@ -3,6 +3,77 @@ from src.models import BusinessIdea
 from src.agents import generate_ai_idea_logic, refine_idea_logic, roast_idea_logic
 from src.tools import perform_market_research
 import src.database as db  # <--- NEW IMPORT
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src import tracing
+import contextvars
+import uuid
+
+# ==========================================
+# PIPELINES (User and AI sides are independent, so they run concurrently)
+# ==========================================
+
+@tracing.traced("node", "gladiator_user_opening")
+def user_opening_pipeline(niche_input, user_title, user_desc):
+    """Research & roast the user's first pitch"""
+    idea = BusinessIdea(title=user_title, description=user_desc, target_niche=niche_input)
+    idea.market_research = perform_market_research(f"{niche_input} {user_title}")
+    return roast_idea_logic(idea)
+
+@tracing.traced("node", "gladiator_ai_opening")
+def ai_opening_pipeline(niche_input):
+    """Generate (with its own scouting), research & roast the AI counter-idea"""
+    idea = generate_ai_idea_logic(niche_input, 1, "")
+    idea.target_niche = niche_input
+    idea.market_research = perform_market_research(f"{niche_input} {idea.title}")
+    return roast_idea_logic(idea)
+
+@tracing.traced("node", "gladiator_user_refinement")
+def user_refinement_pipeline(user_idea, new_user_desc):
+    """Re-roast the user's refined pitch"""
+    user_idea.description = new_user_desc
+    return roast_idea_logic(user_idea)
+
+@tracing.traced("node", "gladiator_ai_refinement")
+def ai_refinement_pipeline(ai_idea):
+    """Refine the AI idea from its critique, then re-roast it"""
+    return roast_idea_logic(refine_idea_logic(ai_idea))
+
+def run_both_sides(user_job, ai_job):
+    """Runs both pipelines at once and shows each side the moment it lands.
+
+    Only the worker threads call the LLM / search; all Streamlit calls stay on the script thread.
+    Returns None if either side failed (the error is shown in that side's slot).
+    """
+    col_user, col_ai = st.columns(2)
+    slots = {"user": col_user.empty(), "ai": col_ai.empty()}
+    slots["user"].info("👤 Roasting your idea...")
+    slots["ai"].info("🤖 AI is working on its idea...")
+
+    results = {}
+    failed = False
+    # Both sides' spans belong to this game (one trace session per game, new one on reset)
+    trace_id = st.session_state.setdefault("gladiator_trace_id", f"gladiator-{uuid.uuid4().hex[:12]}")
+    with tracing.session(trace_id), ThreadPoolExecutor(max_workers=2, thread_name_prefix="gladiator") as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, user_job): "user",
+            pool.submit(contextvars.copy_context().run, ai_job): "ai",
+        }
+        for future in as_completed(futures):
+            side = futures[future]
+            label = "👤 You" if side == "user" else "🤖 AI"
+            try:
+                idea = future.result()
+            except Exception as e:
+                # e.g. search/Gemini down after retries -> let the player retry instead of crashing
+                failed = True
+                slots[side].error(f"{label}: {type(e).__name__}: {e}")
+                continue
+            results[side] = idea
+            slots[side].success(f"{label}: **{idea.title}** scored {idea.score_overall:.1f}")
+
+    if failed:
+        return None
+    return results["user"], results["ai"]
 
 def run_gladiator_mode(niche_input):
     st.header(f"🥊 Gladiator Mode: You vs AI ({niche_input})")
@@ -20,6 +91,7 @@ def run_gladiator_mode(niche_input):
         st.session_state.user_idea = None
         st.session_state.ai_idea = None
         st.session_state.gladiator_saved = False
+        st.session_state.pop("gladiator_trace_id", None)
         st.rerun()
 
     # --- STEP 1: IDEATION ---
@@ -33,21 +105,14 @@ def run_gladiator_mode(niche_input):
             if st.button("Submit & Fight"):
                 if user_title and user_desc:
                     with st.spinner("🤖 AI is generating a counter-idea & researching..."):
-                        # 1. Setup User Idea
-                        st.session_state.user_idea = BusinessIdea(
-                            title=user_title, description=user_desc, target_niche=niche_input
+                        # Research & Roast (Round 1) - both sides at the same time
+                        outcome = run_both_sides(
+                            lambda: user_opening_pipeline(niche_input, user_title, user_desc),
+                            lambda: ai_opening_pipeline(niche_input)
                         )
-                        # 2. Setup AI Idea
-                        st.session_state.ai_idea = generate_ai_idea_logic(niche_input, 1, "")
-                        st.session_state.ai_idea.target_niche = niche_input
-                        
-                        # 3. Research & Roast (Round 1)
-                        st.session_state.user_idea.market_research = perform_market_research(f"{niche_input} {user_title}")
-                        st.session_state.user_idea = roast_idea_logic(st.session_state.user_idea)
-                        
-                        st.session_state.ai_idea.market_research = perform_market_research(f"{niche_input} {st.session_state.ai_idea.title}")
-                        st.session_state.ai_idea = roast_idea_logic(st.session_state.ai_idea)
                         
+                    if outcome:
+                        st.session_state.user_idea, st.session_state.ai_idea = outcome
                         st.session_state.game_step = "REFINEMENT"
                         st.rerun()
 
@@ -76,14 +141,15 @@ def run_gladiator_mode(niche_input):
             
             if st.form_submit_button("Submit Refinement"):
                 with st.spinner("🔄 Both sides are refining..."):
-                    # 1. Update User
-                    st.session_state.user_idea.description = new_user_desc
-                    st.session_state.user_idea = roast_idea_logic(st.session_state.user_idea) 
-                    
-                    # 2. Update AI
-                    st.session_state.ai_idea = refine_idea_logic(st.session_state.ai_idea)
-                    st.session_state.ai_idea = roast_idea_logic(st.session_state.ai_idea)
+                    # User re-roast and AI refine+roast run concurrently
+                    user_idea, ai_idea = st.session_state.user_idea, st.session_state.ai_idea
+                    outcome = run_both_sides(
+                        lambda: user_refinement_pipeline(user_idea, new_user_desc),
+                        lambda: ai_refinement_pipeline(ai_idea)
+                    )
                     
+                if outcome:
+                    st.session_state.user_idea, st.session_state.ai_idea = outcome
                     st.session_state.game_step = "FINAL"
                     st.rerun()
 
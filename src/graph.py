@@ -1,6 +1,14 @@
-from langgraph.graph import StateGraph, END
-from src.models import BattleState, BusinessIdea
-from src.agents import generate_node, roast_node, research_node
+import time
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
+from langchain_core.runnables import RunnableLambda
+from src.models import BattleState, BattleConfig, BusinessIdea
+import src.database as db
+from src import tracing
+from src.agents import (
+    generate_node, roast_node, research_node,
+    agenerate_node, aroast_node, aresearch_node
+)
 
 # --- HELPER NODES & ROUTERS ---
 
@@ -9,21 +17,92 @@ def roast_node_with_history(state: BattleState):
     result = roast_node(state)
     scored_idea = result["current_idea"]
     
-    # Append to full history
-    current_history = state.all_iterations + [scored_idea.model_copy()]
-    
+    return _history_update(state, scored_idea)
+
+async def aroast_node_with_history(state: BattleState):
+    result = await aroast_node(state)
+    return _history_update(state, result["current_idea"])
+
+def _history_update(state: BattleState, scored_idea: BusinessIdea):
+    # Persist the iteration immediately, so the trajectory survives even if the run dies later
+    if state.run_id:
+        db.save_iteration(state.run_id, scored_idea)
+    history = [scored_idea.model_copy()]
+
+    # Decide here (routers can't write state) whether this lineage keeps refining
+    reason = stop_reason(state, scored_idea)
+    if reason:
+        print(f"--- 🛑 Stopping refinement ({reason}) ---")
+        if state.config.early_stopping:
+            scored_idea = _best_of_round(state, scored_idea)
+        scored_idea.stop_reason = reason
+
+    # Append to full history (the reducer on BattleState concatenates)
     return {
         "current_idea": scored_idea,
-        "all_iterations": current_history
+        "all_iterations": history
     }
 
+# --- ADAPTIVE STOPPING ---
+
+LLM_CALLS_PER_ITERATION = 2  # generate/refine + roast
+
+def _round_scores(state: BattleState):
+    return [i.score_overall for i in state.all_iterations if i.round_id == state.current_round]
+
+def planned_rounds(config: BattleConfig):
+    """Rounds that fit in max_llm_calls (each needs at least a generate + roast); at least one always runs"""
+    if config.max_llm_calls is None:
+        return config.max_rounds
+    return max(1, min(config.max_rounds, config.max_llm_calls // LLM_CALLS_PER_ITERATION))
+
+def time_budget_spent(state: BattleState):
+    config = state.config
+    return config.time_budget_s is not None and time.time() - state.started_at >= config.time_budget_s
+
+def stop_reason(state: BattleState, scored_idea: BusinessIdea):
+    """Why this lineage should stop after `scored_idea`, or None to refine again.
+
+    The budgets apply whether or not early stopping is on; the score-based rules only with it.
+    """
+    config = state.config
+    if state.current_iteration >= config.max_iterations:
+        return "max_iterations"
+
+    if config.early_stopping:
+        scores = _round_scores(state) + [scored_idea.score_overall]
+        if scored_idea.score_overall >= config.target_score:
+            return "target_score"
+        if len(scores) > 1 and scores[-1] < scores[-2]:
+            return "regressed"
+        gains = [later - earlier for earlier, later in zip(scores, scores[1:])]
+        if len(gains) >= config.plateau_patience and all(g < config.min_improvement for g in gains[-config.plateau_patience:]):
+            return "plateau"
+
+    # Budgets: stop if one more refinement would not fit in this lineage's share
+    if config.max_llm_calls is not None:
+        lineage_budget = config.max_llm_calls / planned_rounds(config)
+        if LLM_CALLS_PER_ITERATION * (state.current_iteration + 1) > lineage_budget:
+            return "llm_budget"
+    if time_budget_spent(state):
+        return "time_budget"
+    return None
+
+def _best_of_round(state: BattleState, scored_idea: BusinessIdea):
+    """Finalize the best iteration of the round, not necessarily the last one (early stopping only)"""
+    best = max(
+        [i for i in state.all_iterations if i.round_id == state.current_round] + [scored_idea],
+        key=lambda i: i.score_overall
+    )
+    return best.model_copy() if best is not scored_idea else scored_idea
+
 def save_and_reset(state: BattleState):
     """Save the finished idea to the leaderboard and prepare for the next round"""
     finished_idea = state.current_idea
     print(f"✅ Idea Finalized: {finished_idea.title} (Score: {finished_idea.score_overall:.1f})")
     
     return {
-        "completed_ideas": state.completed_ideas + [finished_idea],
+        "completed_ideas": [finished_idea],
         "current_round": state.current_round + 1,
         "current_iteration": 0, # Reset iteration for the new idea
         "current_idea": None    # Clear current idea for the new round
@@ -33,36 +112,134 @@ def battle_router(state: BattleState):
     """Decides if we refine the current idea, start a new round, or end"""
     config = state.config
     
-    # 1. Check Iterations (Refinement Loop)
-    if state.current_iteration < config.max_iterations:
+    # 1. Check Iterations (Refinement Loop; the roast node decides when a lineage is done)
+    if not state.current_idea.stop_reason:
         return "refine"
     
-    # 2. Check Rounds (New Idea Loop)
+    # 2. Check Rounds (New Idea Loop; rounds the budgets can't cover are skipped)
     else:
-        if state.current_round < config.max_rounds:
+        if state.current_round < planned_rounds(config) and not time_budget_spent(state):
             return "new_round"
         else:
             return "end_game"
 
 def post_save_router(state: BattleState):
     """After saving, do we really end or go back to generate?"""
-    if state.current_round > state.config.max_rounds:
+    if state.current_round > planned_rounds(state.config) or time_budget_spent(state):
         return END
     return "generate"
 
+# --- NODE WRAPPERS (sync + async) ---
+
+def dual_node(name, func, afunc):
+    """One node, two bodies: `func` under invoke/stream, `afunc` under ainvoke/astream (both traced as `name`)"""
+    return RunnableLambda(tracing.traced("node", name)(func), afunc=tracing.traced("node", name)(afunc), name=func.__name__)
+
+GENERATE = dual_node("generate", generate_node, agenerate_node)
+RESEARCH = dual_node("research", research_node, aresearch_node)
+ROAST = dual_node("roast", roast_node_with_history, aroast_node_with_history)
+
+# --- PARALLEL MODE (one lineage per round, all at once) ---
+
+def start_router(state: BattleState):
+    """Sequential battles start at generate; parallel battles fan out one lineage per round"""
+    if not state.config.parallel_rounds:
+        return "generate"
+
+    return [
+        Send("run_lineage", BattleState(
+            config=state.config, current_round=round_id, run_id=state.run_id, started_at=state.started_at
+        ))
+        for round_id in range(1, planned_rounds(state.config) + 1)
+    ]
+
+def lineage_router(state: BattleState):
+    """Inside a single lineage we only loop on refinements"""
+    if not state.current_idea.stop_reason:
+        return "refine"
+    return END
+
+_round_graph = None
+
+def get_round_graph():
+    """Compiled generate -> research -> roast (-> refine) chain for a single round"""
+    global _round_graph
+    if _round_graph is None:
+        workflow = StateGraph(BattleState)
+        workflow.add_node("generate", GENERATE)
+        workflow.add_node("research", RESEARCH)
+        workflow.add_node("roast", ROAST)
+
+        workflow.set_entry_point("generate")
+        workflow.add_edge("generate", "research")
+        workflow.add_edge("research", "roast")
+        workflow.add_conditional_edges(
+            "roast",
+            lineage_router,
+            {
+                "refine": "generate",
+                END: END
+            }
+        )
+        _round_graph = workflow.compile()
+    return _round_graph
+
+def run_lineage(state: BattleState):
+    """Runs one round to completion; the reducers merge it into the parent battle"""
+    result = get_round_graph().invoke(state, config=graph_run_config(state.config))
+    return _lineage_update(result)
+
+async def arun_lineage(state: BattleState):
+    result = await get_round_graph().ainvoke(state, config=graph_run_config(state.config))
+    return _lineage_update(result)
+
+def _lineage_update(result):
+    finished_idea = result["current_idea"]
+    print(f"✅ Idea Finalized: {finished_idea.title} (Score: {finished_idea.score_overall:.1f})")
+
+    return {
+        "completed_ideas": [finished_idea],
+        "all_iterations": result["all_iterations"]
+    }
+
+def graph_run_config(config: BattleConfig, thread_id: str = None):
+    """Runtime config for app.invoke: concurrency cap for the fan-out and enough recursion headroom.
+
+    Pass `thread_id` when the graph was built with a checkpointer (it identifies the battle to resume).
+    """
+    steps_per_round = config.max_iterations * 3 + 1
+    run_config = {
+        "max_concurrency": config.max_concurrency,
+        "recursion_limit": config.max_rounds * steps_per_round + 10
+    }
+    if thread_id:
+        run_config["configurable"] = {"thread_id": thread_id}
+    return run_config
+
 # --- MAIN GRAPH BUILDER ---
 
-def build_graph():
+def build_graph(checkpointer=None):
+    """Compiles the battle graph. With a checkpointer, state is saved after every node."""
     workflow = StateGraph(BattleState)
     
     # 1. Add Nodes
-    workflow.add_node("generate", generate_node)
-    workflow.add_node("research", research_node)
-    workflow.add_node("roast", roast_node_with_history) # Uses the wrapper
-    workflow.add_node("save_idea", save_and_reset)
+    # (each node has a sync and an async body, so both invoke and ainvoke work)
+    workflow.add_node("generate", GENERATE)
+    workflow.add_node("research", RESEARCH)
+    workflow.add_node("roast", ROAST)  # Uses the history wrapper
+    workflow.add_node("save_idea", tracing.traced("node", "save_idea")(save_and_reset))
+    workflow.add_node("run_lineage", dual_node("run_lineage", run_lineage, arun_lineage))  # Parallel mode only
     
-    # 2. Set Entry Point
-    workflow.set_entry_point("generate")
+    # 2. Set Entry Point (sequential loop, or parallel fan-out)
+    workflow.add_conditional_edges(
+        START,
+        start_router,
+        {
+            "generate": "generate",
+            "run_lineage": "run_lineage"
+        }
+    )
+    workflow.add_edge("run_lineage", END)
     
     # 3. Add Edges (The Flow)
     # Generate -> Research -> Roast
@@ -90,4 +267,4 @@ def build_graph():
         }
     )
     
-    return workflow.compile()
\ No newline at end of file
+    return workflow.compile(checkpointer=checkpointer)
\ No newline at end of file
@@ -0,0 +1,171 @@
+import contextvars
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from src.models import HalvingConfig
+from src.agents import generate_ai_idea_logic, refine_idea_logic, roast_idea_logic, roast_ideas_batch, scouting_topic
+from src.tools import perform_market_research, perform_incremental_research, compact_research
+import src.database as db
+from src import tracing
+
+# ==========================================
+# SUCCESSIVE-HALVING TOURNAMENT (wide idea searches on a small budget)
+# ==========================================
+# 1. Pool:   `pool_size` ideas generated from ONE shared scouting search (one Gemini call each)
+# 2. Screen: every idea gets a quick roast against that same intel (no per-idea searches,
+#            trimmed research, scores + a one-line critique)
+# 3. Rounds: only the top `keep_fraction` advances. Round 1 researches each survivor and roasts it
+#            properly; later rounds also refine it from its critique. The rest stop where they were cut.
+# Each candidate's number is stored as its round_id, so its trajectory reads like a lineage.
+
+# The pool prompts share one cut of the scouting intel, shorter than a regular battle's (there are 20+ of them)
+POOL_RESEARCH_TOKENS = int(os.getenv("IDEAFORGE_POOL_TOKENS", "250"))
+
+def advancing(count, keep_fraction):
+    """How many of `count` ideas go through to the next round (always at least one)"""
+    return max(1, math.ceil(count * keep_fraction))
+
+def planned_llm_calls(config: HalvingConfig):
+    """Gemini calls a tournament makes when nothing fails (pool + screen + the rounds)"""
+    calls = 2 * config.pool_size
+    alive = config.pool_size
+    for round_id in range(1, config.rounds + 1):
+        alive = advancing(alive, config.keep_fraction)
+        calls += alive if round_id == 1 else 2 * alive
+    return calls
+
+# --- Per-candidate pipelines (run in worker threads) ---
+
+@tracing.traced("node", "halving_generate")
+def _generate_candidate(niche, number, scouting):
+    idea = generate_ai_idea_logic(niche, number, scouting)
+    idea.target_niche = niche
+    idea.round_id = number
+    idea.iteration_count = 1
+    # The quick roast judges every candidate on the shared intel
+    idea.market_research = scouting
+    return idea
+
+@tracing.traced("node", "halving_research")
+def _research_and_roast(idea):
+    idea = idea.model_copy()
+    idea.market_research = perform_market_research(f"{idea.target_niche} {idea.title}")
+    return roast_idea_logic(idea)
+
+@tracing.traced("node", "halving_refine")
+def _refine_and_roast(idea, attempt):
+    refined = refine_idea_logic(idea)
+    # Numbered by attempt, not by the kept idea: a rejected refinement must not share its row
+    refined.iteration_count = attempt
+    # Only fetch what is new since this candidate's last research
+    refined.market_research = perform_incremental_research(f"{refined.target_niche} {refined.title}", idea.market_research)
+    return roast_idea_logic(refined)
+
+def _run_all(jobs, max_concurrency, on_done=None):
+    """Runs {key: callable} in a thread pool -> {key: result or the Exception it raised}.
+
+    `on_done(key, outcome)` is called in the caller's thread as each job lands (safe for UI updates).
+    """
+    outcomes = {}
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="halving") as pool:
+        futures = {pool.submit(contextvars.copy_context().run, job): key for key, job in jobs.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                outcomes[key] = future.result()
+            except Exception as e:
+                outcomes[key] = e
+            if on_done:
+                on_done(key, outcomes[key])
+    return outcomes
+
+def _by_score(ideas, numbers):
+    return sorted(numbers, key=lambda n: ideas[n].score_overall, reverse=True)
+
+# --- Tournament ---
+
+def run_halving(config: HalvingConfig, run_id=None, on_event=None):
+    """Runs a successive-halving tournament and returns every candidate, finalists first.
+
+    Ideas are ordered by how far they got, then by score. `stop_reason` says where each one
+    stopped: winner, finalist, cut_round_<n>, screened_out or error.
+    Every roast after the screen is saved under `run_id` (if given) as it happens.
+    `on_event(message)` receives progress lines, always from the calling thread.
+    """
+    notify = on_event or (lambda message: None)
+
+    # 1. One scouting search feeds the whole pool
+    scouting = compact_research(
+        perform_market_research(scouting_topic(config.niche)), focus=config.niche, budget=POOL_RESEARCH_TOKENS
+    )
+
+    # 2. Wide pool
+    notify(f"💡 Generating {config.pool_size} candidate ideas...")
+    outcomes = _run_all(
+        {n: partial(_generate_candidate, config.niche, n, scouting) for n in range(1, config.pool_size + 1)},
+        config.max_concurrency
+    )
+    candidates = [idea for _, idea in sorted(outcomes.items()) if not isinstance(idea, Exception)]
+    if len(candidates) < len(outcomes):
+        notify(f"⚠️ {len(outcomes) - len(candidates)} candidate(s) could not be generated")
+    if not candidates:
+        raise RuntimeError("No candidate ideas could be generated")
+
+    # 3. Quick screen of the whole pool
+    notify(f"⚡ Quick-roasting {len(candidates)} ideas...")
+    screened = roast_ideas_batch(candidates, max_concurrency=config.max_concurrency, quick=True)
+    ideas = {idea.round_id: idea for idea in screened if not isinstance(idea, Exception)}
+    if len(ideas) < len(candidates):
+        notify(f"⚠️ {len(candidates) - len(ideas)} idea(s) failed the quick roast")
+    if not ideas:
+        raise RuntimeError("No candidate ideas could be scored")
+
+    # 4. Successive rounds on a shrinking field
+    reached = dict.fromkeys(ideas, 0)
+    attempts = dict.fromkeys(ideas, 1)
+    alive = _by_score(ideas, ideas)
+    for round_id in range(1, config.rounds + 1):
+        keep = advancing(len(alive), config.keep_fraction)
+        for n in alive[keep:]:
+            ideas[n].stop_reason = "screened_out" if round_id == 1 else f"cut_round_{round_id - 1}"
+        alive = alive[:keep]
+
+        step = "Researching" if round_id == 1 else "Refining"
+        notify(f"🏁 Round {round_id}: {step} the top {len(alive)}...")
+        if round_id == 1:
+            jobs = {n: partial(_research_and_roast, ideas[n]) for n in alive}
+        else:
+            for n in alive:
+                attempts[n] += 1
+            jobs = {n: partial(_refine_and_roast, ideas[n], attempts[n]) for n in alive}
+
+        def landed(n, outcome):
+            if isinstance(outcome, Exception):
+                notify(f"❌ {ideas[n].title}: {type(outcome).__name__}: {outcome}")
+                return
+            if run_id:
+                db.save_iteration(run_id, outcome)
+            notify(f"🔥 {outcome.title} scored **{outcome.score_overall:.1f}** - {outcome.critique}")
+
+        outcomes = _run_all(jobs, config.max_concurrency, on_done=landed)
+        for n, outcome in outcomes.items():
+            if isinstance(outcome, Exception):
+                ideas[n].stop_reason = "error"
+                alive.remove(n)
+                continue
+            reached[n] = round_id
+            # Round 1 replaces the screening score; a refinement is only kept if it scores at least as well
+            if round_id == 1 or outcome.score_overall >= ideas[n].score_overall:
+                ideas[n] = outcome
+            else:
+                # The kept idea still reports every attempt made on its lineage
+                ideas[n] = ideas[n].model_copy(update={"iteration_count": attempts[n]})
+        if not alive:
+            break
+        alive = _by_score(ideas, alive)
+
+    for position, n in enumerate(alive):
+        ideas[n].stop_reason = "winner" if position == 0 else "finalist"
+
+    return [ideas[n] for n in sorted(ideas, key=lambda n: (reached[n], ideas[n].score_overall), reverse=True)]
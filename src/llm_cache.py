@@ -0,0 +1,205 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from functools import lru_cache
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk
+from src.database import DB_NAME
+from src.research_cache import normalize_query
+from src import tracing
+
+LLM_CACHE_DB_NAME = os.path.join(os.path.dirname(DB_NAME), "llm_cache.db")
+
+# off          -> every call goes to Gemini
+# read_through -> serve hits from the cache, record misses (default; roasts only, see below)
+# record       -> always call Gemini, but store every response and search result (to build a replay set)
+# replay       -> never call Gemini or DuckDuckGo; a miss is an error (offline regression tests / demos)
+CACHE_MODES = ("off", "read_through", "record", "replay")
+DEFAULT_MODE = os.getenv("IDEAFORGE_LLM_CACHE", "read_through")
+# Generating / refining is meant to be creative: with read_through, pressing Start again on the same niche
+# would replay yesterday's ideas word for word. Those steps skip the cache unless this is set to 1
+# (record and replay always cover every step, a replay needs them all).
+CACHE_GENERATION = os.getenv("IDEAFORGE_LLM_CACHE_GENERATION", "0") == "1"
+# LRU bound so the file never grows forever (raise it when recording a large replay set)
+DEFAULT_MAX_ENTRIES = int(os.getenv("IDEAFORGE_LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# What a cached response may contain: we only ever store chat generations from our own model
+ALLOWED_OBJECTS = (ChatGeneration, ChatGenerationChunk, AIMessage, AIMessageChunk)
+# loads() announces once per process that it is a beta API; that says nothing about our data
+warnings.filterwarnings("ignore", message=r"The function `loads` is in beta")
+
+
+class ReplayMissError(LookupError):
+    """Raised in replay mode when a prompt (or search) was never recorded"""
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Content address: hash of the rendered prompt plus the model config (name, temperature, ...)"""
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache(BaseCache):
+    """Content-addressed LLM response cache stored in SQLite"""
+
+    def __init__(self, path=LLM_CACHE_DB_NAME, mode=DEFAULT_MODE, max_entries=DEFAULT_MAX_ENTRIES):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}', expected one of {CACHE_MODES}")
+        self.path = path
+        self.mode = mode
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''CREATE TABLE IF NOT EXISTS llm_responses (
+                            key TEXT PRIMARY KEY,
+                            llm_string TEXT,
+                            response TEXT,
+                            created_at REAL,
+                            last_accessed REAL
+                        )''')
+        # Files created before the LRU bound: add the column, oldest entries count as least recently used
+        if "last_accessed" not in {row[1] for row in conn.execute("PRAGMA table_info(llm_responses)")}:
+            conn.execute("ALTER TABLE llm_responses ADD COLUMN last_accessed REAL")
+            conn.execute("UPDATE llm_responses SET last_accessed = created_at")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_lru ON llm_responses(last_accessed)")
+        # The search results a recorded battle used: its research (and so its prompts) can be replayed exactly
+        conn.execute('''CREATE TABLE IF NOT EXISTS search_responses (
+                            query TEXT PRIMARY KEY,
+                            result TEXT,
+                            created_at REAL,
+                            last_accessed REAL
+                        )''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_search_responses_lru ON search_responses(last_accessed)")
+        conn.commit()
+        conn.close()
+
+    def caches_step(self, creative: bool) -> bool:
+        """Whether a step's responses go through the cache (creative = generate / refine)"""
+        return not creative or self.mode != "read_through" or CACHE_GENERATION
+
+    def lookup(self, prompt: str, llm_string: str):
+        if self.mode in ("off", "record"):
+            return None
+
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+            else:
+                # Touch the entry so LRU eviction keeps it around
+                conn.execute("UPDATE llm_responses SET last_accessed = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+                self.hits += 1
+                tracing.record_cache_hit()
+            conn.close()
+
+        if row is None:
+            if self.mode == "replay":
+                raise ReplayMissError(f"No recorded LLM response for prompt {key[:12]}")
+            return None
+        return loads(row[0], allowed_objects=ALLOWED_OBJECTS)
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        if self.mode in ("off", "replay"):
+            return
+
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                '''INSERT OR REPLACE INTO llm_responses (key, llm_string, response, created_at, last_accessed)
+                   VALUES (?, ?, ?, ?, ?)''',
+                (key, llm_string, dumps(list(return_val)), now, now)
+            )
+            conn.execute(
+                '''DELETE FROM llm_responses WHERE key IN (
+                       SELECT key FROM llm_responses
+                       ORDER BY last_accessed DESC
+                       LIMIT -1 OFFSET ?
+                   )''',
+                (self.max_entries,)
+            )
+            conn.commit()
+            conn.close()
+
+    def lookup_search(self, query: str) -> str:
+        """Replay mode: the recorded result of a search (ReplayMissError if it was never recorded)"""
+        key = normalize_query(query)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT result FROM search_responses WHERE query = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE search_responses SET last_accessed = ? WHERE query = ?", (time.time(), key))
+                conn.commit()
+            conn.close()
+        if row is None:
+            raise ReplayMissError(f"No recorded search result for '{key}'")
+        return row[0]
+
+    def record_search(self, query: str, result: str):
+        """Record mode: keep the search result the battle actually used (no TTL, same LRU bound)"""
+        if self.mode != "record":
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO search_responses (query, result, created_at, last_accessed) VALUES (?, ?, ?, ?)",
+                (normalize_query(query), result, now, now)
+            )
+            conn.execute(
+                '''DELETE FROM search_responses WHERE query IN (
+                       SELECT query FROM search_responses
+                       ORDER BY last_accessed DESC
+                       LIMIT -1 OFFSET ?
+                   )''',
+                (self.max_entries,)
+            )
+            conn.commit()
+            conn.close()
+
+    def clear(self, **kwargs):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM llm_responses")
+            conn.execute("DELETE FROM search_responses")
+            conn.commit()
+            conn.close()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def build_response_cache(mode=DEFAULT_MODE):
+    """Cache to hand to the chat model, or None when caching is switched off"""
+    if mode == "off":
+        return None
+    return ResponseCache(mode=mode)
+
+@lru_cache(maxsize=None)
+def get_response_cache():
+    """The process-wide cache shared by the chat model and the searches (mode from IDEAFORGE_LLM_CACHE)"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return build_response_cache(os.getenv("IDEAFORGE_LLM_CACHE", DEFAULT_MODE))
@@ -1,5 +1,7 @@
+import operator
+import time
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Annotated, List, Optional
 
 class BusinessIdea(BaseModel):
     title: str
@@ -17,18 +19,43 @@ class BusinessIdea(BaseModel):
     critique: Optional[str] = None
     round_id: int = 0
     iteration_count: int = 0
+    # Why refinement of this lineage stopped (set on the finalized idea; see src.graph.stop_reason and src.halving)
+    stop_reason: Optional[str] = None
 
 # ... (BattleConfig and BattleState remain the same) ...
 class BattleConfig(BaseModel):
     niche: str
     max_rounds: int = 2
     max_iterations: int = 2
+    # Parallel mode: run every round's lineage at once instead of one after another
+    parallel_rounds: bool = False
+    max_concurrency: int = 3
+    # Adaptive stopping: max_iterations becomes an upper bound, a lineage stops as soon as refining stops paying off
+    early_stopping: bool = True
+    target_score: float = 8.5          # Good enough, stop refining
+    min_improvement: float = 0.25      # Smaller gains than this count as a plateau...
+    plateau_patience: int = Field(default=1, ge=1)  # ...for this many refinements in a row
+    max_llm_calls: Optional[int] = None     # Per battle (split evenly between the rounds it can pay for)
+    time_budget_s: Optional[float] = None   # Per battle, wall clock (no new round starts once it is spent)
+
+class HalvingConfig(BaseModel):
+    """Successive-halving tournament: screen a wide pool cheaply, spend the full pipeline on the best"""
+    niche: str
+    pool_size: int = Field(default=20, ge=2, le=50)           # Candidates generated and quick-roasted
+    keep_fraction: float = Field(default=0.25, gt=0, lt=1)    # Share advancing after each round
+    rounds: int = Field(default=3, ge=1)   # Round 1 = full research + roast, later rounds refine too
+    max_concurrency: int = 4
 
 class BattleState(BaseModel):
     config: BattleConfig
     current_round: int = 1
     current_iteration: int = 0
     current_idea: Optional[BusinessIdea] = None
-    completed_ideas: List[BusinessIdea] = [] 
-    all_iterations: List[BusinessIdea] = [] 
-    messages: List[str] = []
\ No newline at end of file
+    started_at: float = Field(default_factory=time.time)  # For the time budget
+    # Identifies the run in the database (battle_runs / iterations); every roasted iteration is saved under it
+    run_id: Optional[str] = None
+    # Append-only: nodes return only the new items and the reducers concatenate
+    # (also merges results coming back from parallel lineages)
+    completed_ideas: Annotated[List[BusinessIdea], operator.add] = []
+    all_iterations: Annotated[List[BusinessIdea], operator.add] = []
+    messages: Annotated[List[str], operator.add] = []
\ No newline at end of file
@@ -1,4 +1,3 @@
-import pandas as pd
 import io
 
 def generate_csv_report(ideas):
@@ -17,11 +16,13 @@ def generate_csv_report(ideas):
             "Feasibility": idea.score_feasibility,
             "Moat": idea.score_moat,
             "Market Potential": idea.score_market,
+            "Stop Reason": idea.stop_reason,
             "Market Research Used": idea.market_research,
             "Last Critique": idea.critique
         })
     
-    # Create DataFrame
+    # Create DataFrame (pandas is imported here: it is only needed once a report is requested)
+    import pandas as pd
     df = pd.DataFrame(data)
     
     # Convert to CSV string
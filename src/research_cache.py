@@ -0,0 +1,118 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from src.database import DB_NAME
+
+# Lives next to ideaforge.db so every entry point (graph, Gladiator, CLI) shares it
+CACHE_DB_NAME = os.path.join(os.path.dirname(DB_NAME), "research_cache.db")
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60   # Search results go stale after a day
+DEFAULT_MAX_ENTRIES = 2000           # LRU bound so the file never grows forever
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case and collapse whitespace so trivially different queries share a key"""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class ResearchCache:
+    """SQLite-backed search cache with a TTL and size-bounded LRU eviction"""
+
+    def __init__(self, path=CACHE_DB_NAME, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''CREATE TABLE IF NOT EXISTS research_cache (
+                            query TEXT PRIMARY KEY,
+                            result TEXT,
+                            created_at REAL,
+                            last_accessed REAL
+                        )''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_research_cache_lru ON research_cache(last_accessed)")
+        conn.commit()
+        conn.close()
+
+    def get(self, query: str):
+        """Return the cached result for a query, or None on a miss / expired entry"""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT result, created_at FROM research_cache WHERE query = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    conn.execute("DELETE FROM research_cache WHERE query = ?", (key,))
+                    conn.commit()
+                conn.close()
+                self.misses += 1
+                return None
+
+            # Touch the entry so LRU eviction keeps it around
+            conn.execute("UPDATE research_cache SET last_accessed = ? WHERE query = ?", (now, key))
+            conn.commit()
+            conn.close()
+            self.hits += 1
+            return row[0]
+
+    def set(self, query: str, result: str):
+        """Store a result and evict the least recently used entries over the size bound"""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO research_cache (query, result, created_at, last_accessed) VALUES (?, ?, ?, ?)",
+                (key, result, now, now)
+            )
+            conn.execute(
+                '''DELETE FROM research_cache WHERE query IN (
+                       SELECT query FROM research_cache
+                       ORDER BY last_accessed DESC
+                       LIMIT -1 OFFSET ?
+                   )''',
+                (self.max_entries,)
+            )
+            conn.commit()
+            conn.close()
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM research_cache")
+            conn.commit()
+            conn.close()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process plus the current number of stored entries"""
+        with self._lock:
+            conn = self._connect()
+            size = conn.execute("SELECT COUNT(*) FROM research_cache").fetchone()[0]
+            conn.close()
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": size,
+            }
+
+
+# Shared instance used by src.tools (and therefore by graph nodes, Gladiator mode and the agents)
+research_cache = ResearchCache()
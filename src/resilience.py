@@ -0,0 +1,233 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from langchain_core.rate_limiters import BaseRateLimiter
+from src import tracing
+
+# ==========================================
+# RATE LIMITING, RETRY/BACKOFF & CIRCUIT BREAKING (Gemini + search)
+# ==========================================
+# IDEAFORGE_*_RPM is the quota for everything a run sends. The buckets live in each process, so the
+# headless runner splits the quota between its worker processes (share_quota, its pool initializer).
+# Gemini's bucket is handed to the chat model as its rate_limiter (see agents.get_llm): LangChain
+# takes a token only after the response-cache lookup, so cache hits never spend quota.
+
+PROVIDER_SETTINGS = {
+    "gemini": {
+        "requests_per_minute": float(os.getenv("IDEAFORGE_GEMINI_RPM", "60")),
+        "burst": 5,
+        "max_attempts": 5,
+        "limited_by_client": True,   # The chat model acquires the token, not call_with_retry
+    },
+    "search": {
+        "requests_per_minute": float(os.getenv("IDEAFORGE_SEARCH_RPM", "30")),
+        "burst": 4,
+        "max_attempts": 3,
+    },
+}
+
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+BREAKER_FAILURE_THRESHOLD = 5    # Consecutive provider failures before we stop calling it
+BREAKER_RESET_SECONDS = 60.0     # How long to fail fast before letting a trial call through
+
+# Errors that mean "provider is throttling / flaky", not "our request is wrong"
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded",
+    "InternalServerError", "RatelimitException", "TimeoutException", "Timeout",
+    "TimeoutError", "ConnectionError", "ConnectTimeout", "ReadTimeout",
+}
+RETRYABLE_MARKERS = ("429", "rate limit", "ratelimit", "quota", "timed out", "timeout", "503", "unavailable")
+
+
+class CircuitOpenError(RuntimeError):
+    """The provider has been failing; we fail fast instead of burning a whole battle on it"""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if type(exc).__name__ in RETRYABLE_ERROR_NAMES or isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    message = str(exc).lower()
+    return any(marker in message for marker in RETRYABLE_MARKERS)
+
+
+class TokenBucket(BaseRateLimiter):
+    """Classic token bucket: `rate` tokens per second, up to `capacity` saved for bursts"""
+
+    def __init__(self, requests_per_minute: float, capacity: int):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, requests_per_minute: float, capacity: int):
+        with self._lock:
+            self.rate = requests_per_minute / 60.0
+            self.capacity = capacity
+            self.tokens = min(self.tokens, float(capacity))
+
+    def _try_take(self) -> float:
+        """Take a token if one is available; otherwise return how long to wait for the next one"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        while (wait := self._try_take()) > 0:
+            if not blocking:
+                return False
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        while (wait := self._try_take()) > 0:
+            if not blocking:
+                return False
+            await asyncio.sleep(wait)
+        return True
+
+
+class CircuitBreaker:
+    """closed -> (N consecutive failures) -> open -> (reset timeout) -> half-open: one trial call, the rest fail fast"""
+
+    def __init__(self, name: str, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def before_call(self) -> bool:
+        """Raises CircuitOpenError to fail fast; True if this call is the half-open trial (pass it to end_trial)"""
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                raise CircuitOpenError(f"{self.name} is unavailable (circuit open), failing fast")
+            if self.trial_in_flight:
+                raise CircuitOpenError(f"{self.name} is being probed by a trial call (circuit half-open), failing fast")
+            self.trial_in_flight = True
+            return True
+
+    def end_trial(self, trial: bool):
+        """After the call (whatever happened): lets the next caller probe if the trial settled nothing"""
+        if trial:
+            with self._lock:
+                self.trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                # (Re)open: a failed half-open trial restarts the cool-down
+                self.opened_at = time.monotonic()
+
+
+_limiters = {
+    name: TokenBucket(settings["requests_per_minute"], settings["burst"])
+    for name, settings in PROVIDER_SETTINGS.items()
+}
+_breakers = {name: CircuitBreaker(name) for name in PROVIDER_SETTINGS}
+
+
+def get_limiter(provider: str) -> TokenBucket:
+    return _limiters[provider]
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    return _breakers[provider]
+
+
+def share_quota(processes: int):
+    """Gives this process its share of every provider's quota, when `processes` of them call at once"""
+    for name, settings in PROVIDER_SETTINGS.items():
+        _limiters[name].set_rate(settings["requests_per_minute"] / processes, max(1, settings["burst"] // processes))
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff (attempt starts at 1)"""
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** (attempt - 1)))
+
+
+def call_with_retry(provider: str, fn, *args, **kwargs):
+    """Rate-limited, retried, circuit-broken call to `fn` on behalf of `provider`"""
+    limiter, breaker = _limiters[provider], _breakers[provider]
+    settings = PROVIDER_SETTINGS[provider]
+    max_attempts = settings["max_attempts"]
+
+    for attempt in range(1, max_attempts + 1):
+        trial = breaker.before_call()
+        try:
+            if not settings.get("limited_by_client"):
+                limiter.acquire()
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            breaker.record_failure()
+            if attempt == max_attempts:
+                raise
+            print(f"--- ⏳ {provider} call failed ({type(e).__name__}), retry {attempt}/{max_attempts - 1} ---")
+            tracing.record_retry()
+        else:
+            breaker.record_success()
+            return result
+        finally:
+            # Settled (or reopened) before the next caller may probe; the backoff sleep is outside the trial
+            breaker.end_trial(trial)
+        time.sleep(backoff_delay(attempt))
+
+
+async def acall_with_retry(provider: str, afn, *args, **kwargs):
+    """Async twin of call_with_retry (`afn` is a coroutine function)"""
+    limiter, breaker = _limiters[provider], _breakers[provider]
+    settings = PROVIDER_SETTINGS[provider]
+    max_attempts = settings["max_attempts"]
+
+    for attempt in range(1, max_attempts + 1):
+        trial = breaker.before_call()
+        try:
+            if not settings.get("limited_by_client"):
+                await limiter.aacquire()
+            result = await afn(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            breaker.record_failure()
+            if attempt == max_attempts:
+                raise
+            print(f"--- ⏳ {provider} call failed ({type(e).__name__}), retry {attempt}/{max_attempts - 1} ---")
+            tracing.record_retry()
+        else:
+            breaker.record_success()
+            return result
+        finally:
+            # Settled (or reopened) before the next caller may probe; the backoff sleep is outside the trial
+            breaker.end_trial(trial)
+        await asyncio.sleep(backoff_delay(attempt))
@@ -0,0 +1,167 @@
+import os
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import src.database as db
+from src import resilience, tracing
+
+# ==========================================
+# HEADLESS TOURNAMENT RUNNER (Nightly multi-niche sweeps)
+# ==========================================
+
+def load_niches(niches=None, niches_file=None):
+    """Niches from the command line and/or a file (one per line, '#' comments allowed)"""
+    result = list(niches or [])
+    if niches_file:
+        with open(niches_file, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    result.append(line)
+    # Keep order, drop duplicates
+    return list(dict.fromkeys(result))
+
+_app = None
+
+def _get_app():
+    """One compiled graph per worker process"""
+    global _app
+    if _app is None:
+        from src.graph import build_graph
+        _app = build_graph()
+    return _app
+
+def run_one_battle(niche, rounds, iterations, parallel_rounds=True, mode="Spectator", stopping=None):
+    """Runs a single battle inside a worker process and saves it. Never raises.
+
+    `stopping` holds BattleConfig overrides for adaptive stopping (target_score, max_llm_calls, ...).
+    """
+    from src.graph import graph_run_config
+    from src.models import BattleState, BattleConfig
+
+    start = time.perf_counter()
+    run_id = f"sweep-{uuid.uuid4().hex[:12]}"
+    try:
+        config = BattleConfig(
+            niche=niche, max_rounds=rounds, max_iterations=iterations, parallel_rounds=parallel_rounds,
+            **(stopping or {})
+        )
+        # Registered first so every roasted iteration is persisted under this run as it happens
+        db.start_battle_run(run_id, niche, config.model_dump_json(), mode=mode)
+        with tracing.session(run_id):
+            result = _get_app().invoke(BattleState(config=config, run_id=run_id), config=graph_run_config(config))
+        ideas = result["completed_ideas"]
+        session_id = db.save_battle(niche, ideas, mode=mode)
+        db.mark_battle_run(run_id, "finished", session_id=session_id)
+        best = max(ideas, key=lambda i: i.score_overall) if ideas else None
+        return {
+            "niche": niche,
+            "ok": True,
+            "session_id": session_id,
+            "best_title": best.title if best else None,
+            "best_score": best.score_overall if best else None,
+            "stop_reasons": [idea.stop_reason for idea in ideas],
+            "latency_s": time.perf_counter() - start,
+            "worker_pid": os.getpid(),
+        }
+    except Exception as e:
+        try:
+            db.mark_battle_run(run_id, "failed", error=f"{type(e).__name__}: {e}")
+        except Exception:
+            pass
+        return {
+            "niche": niche,
+            "ok": False,
+            "error": f"{type(e).__name__}: {e}",
+            "latency_s": time.perf_counter() - start,
+            "worker_pid": os.getpid(),
+        }
+
+def run_one_halving(niche, halving, mode="Tournament"):
+    """Runs a successive-halving tournament for one niche inside a worker process and saves it. Never raises.
+
+    `halving` holds HalvingConfig overrides (pool_size, keep_fraction, rounds, ...).
+    """
+    from src.halving import run_halving
+    from src.models import HalvingConfig
+
+    start = time.perf_counter()
+    run_id = f"halving-{uuid.uuid4().hex[:12]}"
+    try:
+        config = HalvingConfig(niche=niche, **halving)
+        db.start_battle_run(run_id, niche, config.model_dump_json(), mode=mode)
+        with tracing.session(run_id):
+            ideas = run_halving(config, run_id=run_id)
+        session_id = db.save_battle(niche, ideas, mode=mode)
+        db.mark_battle_run(run_id, "finished", session_id=session_id)
+        # Ideas come back finalists first, and the winner leads
+        return {
+            "niche": niche,
+            "ok": True,
+            "session_id": session_id,
+            "best_title": ideas[0].title,
+            "best_score": ideas[0].score_overall,
+            "stop_reasons": [idea.stop_reason for idea in ideas],
+            "latency_s": time.perf_counter() - start,
+            "worker_pid": os.getpid(),
+        }
+    except Exception as e:
+        try:
+            db.mark_battle_run(run_id, "failed", error=f"{type(e).__name__}: {e}")
+        except Exception:
+            pass
+        return {
+            "niche": niche,
+            "ok": False,
+            "error": f"{type(e).__name__}: {e}",
+            "latency_s": time.perf_counter() - start,
+            "worker_pid": os.getpid(),
+        }
+
+def summarize(results, elapsed_s):
+    """Throughput and per-battle latency for a finished sweep"""
+    latencies = [r["latency_s"] for r in results if r["ok"]]
+    succeeded = len(latencies)
+    stop_reasons = Counter(reason for r in results if r["ok"] for reason in r["stop_reasons"])
+    return {
+        "battles": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "elapsed_s": elapsed_s,
+        "battles_per_minute": succeeded / (elapsed_s / 60) if elapsed_s > 0 else 0.0,
+        "latency_p50_s": tracing.percentile(latencies, 50),
+        "latency_p95_s": tracing.percentile(latencies, 95),
+        "latency_max_s": max(latencies) if latencies else 0.0,
+        "stop_reasons": dict(stop_reasons),
+    }
+
+def run_tournament(niches, rounds=2, iterations=2, workers=4, parallel_rounds=True, mode="Spectator", on_result=None,
+                   stopping=None, halving=None):
+    """Runs every niche across a process pool (at most `workers` battles at once).
+
+    `on_result` is called in the parent as each battle finishes (progress reporting).
+    With `halving` (HalvingConfig overrides) each niche gets a successive-halving tournament instead.
+    Returns (results, summary).
+    """
+    db.init_db()
+    results = []
+    start = time.perf_counter()
+
+    # Every worker gets its share of the Gemini / search quota (IDEAFORGE_*_RPM covers the whole sweep)
+    concurrent = max(1, min(workers, len(niches)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=resilience.share_quota, initargs=(concurrent,)) as pool:
+        if halving is not None:
+            futures = [pool.submit(run_one_halving, niche, halving, mode) for niche in niches]
+        else:
+            futures = [
+                pool.submit(run_one_battle, niche, rounds, iterations, parallel_rounds, mode, stopping)
+                for niche in niches
+            ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result:
+                on_result(result, len(results), len(niches))
+
+    return results, summarize(results, time.perf_counter() - start)
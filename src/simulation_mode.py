@@ -1,9 +1,88 @@
 import streamlit as st
-import pandas as pd
-from src.graph import build_graph
 from src.models import BattleState, BattleConfig
 import src.database as db
 from src.report_generator import generate_csv_report
+from src.ui_cache import get_battle_app, query
+from src import tracing
+import re
+
+# ==========================================
+# STREAMING (push progress into the status panel as it happens)
+# ==========================================
+
+NODE_LABELS = {
+    "generate": "💡 Generating / refining",
+    "research": "🕵️ Researching",
+    "roast": "🔥 Roasting",
+}
+
+def _partial_field(text, field):
+    """Pull a (possibly unfinished) string field out of the JSON the LLM is still writing"""
+    match = re.search(rf'"{field}"\s*:\s*"((?:[^"\\]|\\.)*)', text)
+    return match.group(1) if match else None
+
+def _token_text(message_chunk):
+    content = message_chunk.content
+    if isinstance(content, str):
+        return content
+    # Some providers stream a list of content parts
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+def stream_battle(app, initial_state, run_config, status):
+    """Runs the graph with app.stream and renders node transitions + LLM tokens live.
+
+    Returns the final state (same shape as app.invoke).
+    """
+    live_box = st.empty()          # Token preview of whatever the LLM is writing right now
+    token_buffers = {}             # (namespace, node) -> text streamed so far
+    final_state = None
+
+    for namespace, mode, chunk in app.stream(
+        initial_state,
+        config=run_config,
+        stream_mode=["updates", "messages", "values"],
+        subgraphs=True,            # Parallel lineages run in their own subgraph
+    ):
+        if mode == "values" and not namespace:
+            final_state = chunk
+
+        elif mode == "messages":
+            message_chunk, metadata = chunk
+            node = metadata.get("langgraph_node", "")
+            key = (namespace, node)
+            token_buffers[key] = token_buffers.get(key, "") + _token_text(message_chunk)
+            text = token_buffers[key]
+
+            title = _partial_field(text, "title")
+            critique = _partial_field(text, "critique")
+            label = NODE_LABELS.get(node, node)
+            if node == "roast" and critique:
+                live_box.markdown(f"{label}: _{critique}_")
+            elif title:
+                live_box.markdown(f"{label}: **{title}**")
+
+        elif mode == "updates":
+            for node, update in chunk.items():
+                token_buffers.pop((namespace, node), None)
+                idea = (update or {}).get("current_idea")
+                lineage = f"[Round {idea.round_id}] " if idea else ""
+
+                if node == "generate" and idea:
+                    status.write(f"{lineage}💡 **{idea.title}** (iteration {idea.iteration_count})")
+                    status.update(label=f"🕵️ Researching {idea.title}...")
+                elif node == "research" and idea:
+                    summary = (idea.market_research or "")[:300]
+                    status.write(f"{lineage}🕵️ Research: {summary}...")
+                    status.update(label=f"🔥 Roasting {idea.title}...")
+                elif node == "roast" and idea:
+                    status.write(f"{lineage}🔥 {idea.title} scored **{idea.score_overall:.1f}** - {idea.critique}")
+                    status.update(label="💡 Refining / generating...")
+                elif node in ("save_idea", "run_lineage"):
+                    for done in (update or {}).get("completed_ideas", []):
+                        status.write(f"✅ Idea Finalized: {done.title} ({done.score_overall:.1f})")
+
+    live_box.empty()
+    return final_state
 
 def run_simulation_mode(niche_input):
     st.header("🤖 Spectator Mode (AI vs AI)")
@@ -15,27 +94,81 @@ def run_simulation_mode(niche_input):
         with col1:
             rounds = st.slider("New Ideas (Rounds)", 1, 3, 1)
         with col2:
-            iterations = st.slider("Refinements per Idea", 1, 3, 2)
+            iterations = st.slider("Max Refinements per Idea", 1, 3, 2)
         with col3:
             st.write("") # Spacing
             start_btn = st.button("🚀 Start Simulation", type="primary", use_container_width=True)
+        parallel = st.toggle("⚡ Run rounds in parallel", value=True, help="Each round's idea evolves independently, so they can all run at once.")
+        t1, t2 = st.columns([2, 3])
+        with t1:
+            early_stopping = st.toggle("🛑 Stop refining early", value=True, help="Stop an idea once it hits the target score, stops improving or gets worse.")
+        with t2:
+            target_score = st.slider("Target score", 5.0, 10.0, 8.5, 0.5, disabled=not early_stopping)
+
+    # --- RESUME (battles interrupted by an error, a rerun or a restart) ---
+    resume_run = None
+    unfinished = query("get_unfinished_battles", "Spectator")
+    if unfinished:
+        with st.expander(f"⏸️ Unfinished Battles ({len(unfinished)})"):
+            for run in unfinished:
+                r1, r2 = st.columns([4, 1])
+                # A recent heartbeat means another tab or session is still streaming this battle
+                live = db.is_live_run(run)
+                with r1:
+                    st.markdown(f"**{run['niche']}** · {run['status']} · {run['updated_at']}")
+                    if live:
+                        st.caption("Still running elsewhere (resumable once it stops making progress)")
+                    elif run["error"]:
+                        st.caption(run["error"])
+                with r2:
+                    if st.button("▶️ Resume", key=f"resume_{run['thread_id']}", disabled=live, use_container_width=True):
+                        if db.claim_battle_run(run["thread_id"]):
+                            resume_run = run
+                        else:
+                            st.warning("This battle was resumed elsewhere.")
 
     # --- EXECUTION LOGIC ---
-    if start_btn:
+    if start_btn or resume_run:
+        # The graph / LangGraph stack is only imported once a battle actually starts
+        from src.graph import graph_run_config
+        from src.checkpoints import new_thread_id, has_checkpoint
+
         with st.status("🏗️ Simulation Running...", expanded=True) as status:
-            config = BattleConfig(niche=niche_input, max_rounds=rounds, max_iterations=iterations)
-            initial_state = BattleState(config=config)
+            if resume_run:
+                # Picks up after the last node that finished; completed steps are not paid for again
+                thread_id = resume_run["thread_id"]
+                config = BattleConfig.model_validate_json(resume_run["config_json"])
+                graph_input = None if has_checkpoint(thread_id) else BattleState(config=config, run_id=thread_id)
+            else:
+                thread_id = new_thread_id()
+                config = BattleConfig(
+                    niche=niche_input, max_rounds=rounds, max_iterations=iterations, parallel_rounds=parallel,
+                    early_stopping=early_stopping, target_score=target_score
+                )
+                graph_input = BattleState(config=config, run_id=thread_id)
+                db.start_battle_run(thread_id, config.niche, config.model_dump_json(), mode="Spectator")
             
-            # Run the LangGraph
-            app = build_graph()
-            result = app.invoke(initial_state)
+            # Run the LangGraph (streamed, so progress shows up as it happens; checkpointed after every node)
+            app = get_battle_app()
+            try:
+                # Every span (node, Gemini call, search) recorded during the run is tagged with this battle
+                with tracing.session(thread_id):
+                    result = stream_battle(app, graph_input, graph_run_config(config, thread_id), status)
+            except Exception as e:
+                # Provider still failing after retries (or circuit open) -> resumable later
+                status.update(label="❌ Simulation failed (you can resume it)", state="error", expanded=True)
+                st.error(f"{type(e).__name__}: {e}")
+                db.mark_battle_run(thread_id, "failed", error=f"{type(e).__name__}: {e}")
+                result = None
             
-            status.update(label="✅ Complete!", state="complete", expanded=False)
-            
-            # Save to DB & Session State
-            # db.save_battle(niche_input, result['completed_ideas'])
-            db.save_battle(niche_input, result['completed_ideas'], mode="Spectator")
-            st.session_state.spectator_results = result['completed_ideas']
+            if result:
+                status.update(label="✅ Complete!", state="complete", expanded=False)
+                
+                # Save to DB & Session State
+                # db.save_battle(niche_input, result['completed_ideas'])
+                session_id = db.save_battle(config.niche, result['completed_ideas'], mode="Spectator")
+                db.mark_battle_run(thread_id, "finished", session_id=session_id)
+                st.session_state.spectator_results = result['completed_ideas']
 
     # --- DISPLAY LOGIC ---
     # We check if results exist (either from a fresh run OR loaded history)
@@ -49,17 +182,17 @@ def run_simulation_mode(niche_input):
         with c1:
             st.subheader("🏆 Battle Results")
         with c2:
-            # Add the CSV Download feature from Phase 6
-            csv_data = generate_csv_report(final_ideas)
+            # Add the CSV Download feature from Phase 6 (built on click, not on every rerun)
             st.download_button(
                 label="📥 Download Report",
-                data=csv_data,
+                data=lambda: generate_csv_report(final_ideas),
                 file_name="ideaforge_report.csv",
                 mime="text/csv",
                 use_container_width=True
             )
 
         # 2. LEADERBOARD (DataFrame View)
+        import pandas as pd
         data = []
         for idea in final_ideas:
             data.append({
@@ -69,6 +202,8 @@ def run_simulation_mode(niche_input):
                 "Feasibility": idea.score_feasibility,
                 "Moat": idea.score_moat,
                 "Market": idea.score_market,
+                "Refinements": idea.iteration_count,
+                "Stopped": idea.stop_reason,
                 "Pitch": idea.description
             })
         
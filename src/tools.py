@@ -1,17 +1,255 @@
-from langchain_community.tools import DuckDuckGoSearchRun
+import asyncio
+import contextvars
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+from src.research_cache import research_cache, normalize_query
+from src.llm_cache import get_response_cache, ReplayMissError
+from src.resilience import call_with_retry
+from src import tracing
 
-search_tool = DuckDuckGoSearchRun()
+@lru_cache(maxsize=None)
+def get_search_tool():
+    """Created on first search (langchain_community is slow to import)"""
+    from langchain_community.tools import DuckDuckGoSearchRun
+    return DuckDuckGoSearchRun()
+
+def __getattr__(name):
+    # `tools.search_tool` still works for existing callers (PEP 562)
+    if name == "search_tool":
+        return get_search_tool()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+SEARCH_TIMEOUT_SECONDS = 15  # Per sub-query; a slow search must not stall the whole battle
+
+# Shared pool for sub-queries (2 per topic, a few topics in flight across sessions)
+_search_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="research")
+
+# Single-flight registry: normalized topic -> Future of the research in progress
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+class ResearchError(RuntimeError):
+    """No search results at all (every sub-query failed). Raised instead of roasting an error string."""
+
+def cached_search(query: str) -> str:
+    """Runs a single search, served from the persistent research cache when possible.
+
+    With the LLM cache in replay mode it comes from the recorded replay set instead (never the network,
+    never expired); in record mode every result a battle uses is added to that set.
+    """
+    with tracing.span("search", "duckduckgo"):
+        replay_set = get_response_cache()
+        if replay_set is not None and replay_set.mode == "replay":
+            result = replay_set.lookup_search(query)
+            tracing.record_cache_hit()
+            return result
+
+        result = research_cache.get(query)
+        if result is not None:
+            tracing.record_cache_hit()
+        else:
+            result = call_with_retry("search", get_search_tool().invoke, query)
+            research_cache.set(query, result)
+
+        if replay_set is not None:
+            replay_set.record_search(query, result)
+        return result
+
+def market_query(topic: str) -> str:
+    return f"market size and growth trends for {topic} 2025"
+
+def competitor_query(topic: str) -> str:
+    return f"top competitors and startups in {topic}"
+
+def _format_research(res_market: str, res_competitors: str) -> str:
+    return f"**Market Data:** {res_market}\n\n**Competitors:** {res_competitors}"
+
+def _run_research(topic: str) -> str:
+    """Fires both sub-queries concurrently and keeps whatever comes back in time"""
+    # We run 2 searches to get better coverage
+    # (each in a copy of our context, so their trace spans stay attached to this battle / node)
+    futures = {
+        "market": _search_pool.submit(contextvars.copy_context().run, cached_search, market_query(topic)),
+        "competitors": _search_pool.submit(contextvars.copy_context().run, cached_search, competitor_query(topic)),
+    }
+
+    results = {}
+    errors = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result(timeout=SEARCH_TIMEOUT_SECONDS)
+        except FutureTimeout:
+            errors[name] = f"timed out after {SEARCH_TIMEOUT_SECONDS}s"
+        except ReplayMissError:
+            # An incomplete recording: a partial result would only turn into a prompt that was never recorded
+            raise
+        except Exception as e:
+            errors[name] = str(e)
+
+    # Nothing usable at all -> fail loudly rather than hand an error message to the roaster
+    if not results:
+        raise ResearchError(f"Research failed: {'; '.join(f'{k}: {v}' for k, v in errors.items())}")
+
+    # Partial result fallback: keep the half that succeeded
+    res_market = results.get("market", f"(unavailable: {errors.get('market')})")
+    res_competitors = results.get("competitors", f"(unavailable: {errors.get('competitors')})")
+    return _format_research(res_market, res_competitors)
 
 def perform_market_research(topic: str) -> str:
     """Searches for market size and competitors"""
+    key = normalize_query(topic)
+
+    # Single-flight: identical topics already being researched share one request
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _in_flight[key] = future
+
+    if not is_leader:
+        return future.result()
+
+    try:
+        result = _run_research(topic)
+    except BaseException as e:
+        # Followers get the same error; never leave them waiting on a leader that died
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+
+    future.set_result(result)
+    return result
+
+# ==========================================
+# INCREMENTAL RESEARCH (Refinement iterations)
+# ==========================================
+
+_SECTIONS = re.compile(r"^\*\*Market Data:\*\* (?P<market>.*)\n\n\*\*Competitors:\*\* (?P<competitors>.*)$", re.DOTALL)
+
+def _parse_research(text: str):
+    """Splits a research blob back into (market, competitors); None if it is not reusable"""
+    match = _SECTIONS.match(text or "")
+    if not match:
+        return None
+    market, competitors = match.group("market"), match.group("competitors")
+    if market.startswith("(unavailable") or competitors.startswith("(unavailable"):
+        return None
+    return market, competitors
+
+def _snippets(text: str):
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+
+def merge_snippets(existing: str, new: str) -> str:
+    """Appends only the snippets from `new` that are not already in `existing`"""
+    seen = {normalize_query(s) for s in _snippets(existing)}
+    merged = [existing] if existing else []
+    for snippet in _snippets(new):
+        key = normalize_query(snippet)
+        if key not in seen:
+            seen.add(key)
+            merged.append(snippet)
+    return " ".join(merged)
+
+def perform_incremental_research(topic: str, previous: str = "") -> str:
+    """Refinement research: keeps the previous market data and only fetches competitors for the new angle"""
+    parsed = _parse_research(previous)
+    if parsed is None:
+        # Nothing usable from the last iteration -> full research
+        return perform_market_research(topic)
+
+    res_market, res_competitors = parsed
     try:
-        # We run 2 searches to get better coverage
-        query_market = f"market size and growth trends for {topic} 2025"
-        query_competitors = f"top competitors and startups in {topic}"
-        
-        res_market = search_tool.invoke(query_market)
-        res_competitors = search_tool.invoke(query_competitors)
-        
-        return f"**Market Data:** {res_market}\n\n**Competitors:** {res_competitors}"
-    except Exception as e:
-        return f"Research failed: {str(e)}"
\ No newline at end of file
+        new_competitors = _search_pool.submit(contextvars.copy_context().run, cached_search, competitor_query(topic)).result(timeout=SEARCH_TIMEOUT_SECONDS)
+    except ReplayMissError:
+        raise
+    except Exception:
+        # The previous iteration's data is still valid, keep it rather than failing
+        return previous
+
+    return _format_research(res_market, merge_snippets(res_competitors, new_competitors))
+
+# ==========================================
+# RESEARCH COMPACTION (what actually goes into a prompt)
+# ==========================================
+# Raw search output is long, repetitive and grows with every refinement (merge_snippets).
+# Before it reaches Gemini we drop near-duplicate snippets, rank the rest by relevance and
+# keep the best ones (in their original order) within a token budget. The full research
+# stays on the idea; only the prompt gets the compact version.
+
+RESEARCH_TOKEN_BUDGET = int(os.getenv("IDEAFORGE_RESEARCH_TOKENS", "500"))
+NEAR_DUPLICATE_OVERLAP = 0.8   # Word-set overlap above which two snippets say the same thing
+
+_WORD = re.compile(r"[a-z0-9]+")
+_FACT = re.compile(r"\d|\$|%")
+_STOPWORDS = {"the", "and", "for", "with", "that", "this", "from", "are", "its", "our", "you", "your", "into", "of", "in", "to", "a", "an", "on", "or", "by", "is"}
+
+def _words(text: str) -> set:
+    return {w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS}
+
+def _rank(snippet: str, focus: set) -> float:
+    """Relevance to the idea, plus a bonus for hard facts (numbers, money, growth)"""
+    score = len(_words(snippet) & focus)
+    if _FACT.search(snippet):
+        score += 1.5
+    if len(snippet) < 30:
+        score -= 1
+    return score
+
+def _select_snippets(text: str, focus: set, budget: int, seen: list) -> str:
+    candidates = []
+    for position, snippet in enumerate(_snippets(text)):
+        words = _words(snippet)
+        if not words or any(len(words & other) / len(words | other) >= NEAR_DUPLICATE_OVERLAP for other in seen):
+            continue
+        seen.append(words)
+        candidates.append((position, snippet))
+
+    chosen, used = [], 0
+    for position, snippet in sorted(candidates, key=lambda c: _rank(c[1], focus), reverse=True):
+        cost = tracing.estimate_tokens(snippet)
+        if used + cost <= budget:
+            chosen.append((position, snippet))
+            used += cost
+    if not chosen and candidates:
+        # Even the best snippet is over budget: cut it at a word boundary
+        best = max(candidates, key=lambda c: _rank(c[1], focus))[1]
+        return best[:budget * 4].rsplit(" ", 1)[0] + "…"
+    return " ".join(snippet for _, snippet in sorted(chosen))
+
+def compact_research(research: str, focus: str = "", budget: int = RESEARCH_TOKEN_BUDGET) -> str:
+    """Deduplicated, relevance-ranked research trimmed to ~`budget` tokens (same two-section format)"""
+    if not research or tracing.estimate_tokens(research) <= budget:
+        return research
+
+    focus_words = _words(focus)
+    seen = []
+    match = _SECTIONS.match(research)
+    if not match:
+        return _select_snippets(research, focus_words, budget, seen)
+
+    # Split the budget by section size, but never starve either one
+    market, competitors = match.group("market"), match.group("competitors")
+    share = len(market) / max(1, len(market) + len(competitors))
+    market_budget = int(budget * min(max(share, 0.3), 0.7))
+    return _format_research(
+        _select_snippets(market, focus_words, market_budget, seen),
+        _select_snippets(competitors, focus_words, budget - market_budget, seen),
+    )
+
+# ==========================================
+# ASYNC WRAPPERS
+# ==========================================
+# DuckDuckGo has no async client (langchain's own ainvoke also runs it in an executor),
+# so we hop to a thread and keep the cache, single-flight and timeouts shared with the sync path.
+
+async def aperform_market_research(topic: str) -> str:
+    return await asyncio.to_thread(perform_market_research, topic)
+
+async def aperform_incremental_research(topic: str, previous: str = "") -> str:
+    return await asyncio.to_thread(perform_incremental_research, topic, previous)
@@ -0,0 +1,129 @@
+import streamlit as st
+import uuid
+from src.models import HalvingConfig
+import src.database as db
+from src.report_generator import generate_csv_report
+from src import tracing
+
+STAGE_LABELS = {
+    "winner": "🏆 Winner",
+    "finalist": "🥈 Finalist",
+    "screened_out": "⚡ Screened out",
+    "error": "❌ Error",
+}
+
+def stage_label(stop_reason):
+    if stop_reason and stop_reason.startswith("cut_round_"):
+        return f"✂️ Cut after round {stop_reason.rsplit('_', 1)[1]}"
+    return STAGE_LABELS.get(stop_reason, stop_reason or "-")
+
+def run_tournament_mode(niche_input):
+    st.header("🏟️ Tournament Mode (Wide Search)")
+    st.markdown("_A wide pool of ideas gets a quick roast; only the best advance to full research and refinement._")
+
+    # --- CONTROLS ---
+    with st.container(border=True):
+        col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+        with col1:
+            pool_size = st.slider("Candidate Ideas", 8, 50, 20)
+        with col2:
+            keep_fraction = st.select_slider(
+                "Advance each round", [0.5, 1 / 3, 0.25, 0.2], value=0.25, format_func=lambda f: f"top {f:.0%}"
+            )
+        with col3:
+            rounds = st.slider("Rounds", 1, 4, 3)
+        with col4:
+            st.write("") # Spacing
+            start_btn = st.button("🚀 Start Tournament", type="primary", use_container_width=True)
+
+        config = HalvingConfig(niche=niche_input, pool_size=pool_size, keep_fraction=keep_fraction, rounds=rounds)
+        # The halving logic is only imported once the mode is on screen (it pulls in the agent stack)
+        from src.halving import planned_llm_calls
+        st.caption(f"≈ {planned_llm_calls(config)} Gemini calls, most of them short (pool + quick roast).")
+
+    # --- EXECUTION LOGIC ---
+    if start_btn:
+        from src.halving import run_halving
+
+        run_id = f"halving-{uuid.uuid4().hex[:12]}"
+        with st.status("🏗️ Tournament Running...", expanded=True) as status:
+            db.start_battle_run(run_id, config.niche, config.model_dump_json(), mode="Tournament")
+            try:
+                with tracing.session(run_id):
+                    ideas = run_halving(config, run_id=run_id, on_event=status.write)
+            except Exception as e:
+                status.update(label="❌ Tournament failed", state="error", expanded=True)
+                st.error(f"{type(e).__name__}: {e}")
+                db.mark_battle_run(run_id, "failed", error=f"{type(e).__name__}: {e}")
+                ideas = None
+
+            if ideas:
+                status.update(label="✅ Complete!", state="complete", expanded=False)
+                session_id = db.save_battle(config.niche, ideas, mode="Tournament")
+                db.mark_battle_run(run_id, "finished", session_id=session_id)
+                st.session_state.tournament_results = ideas
+
+    # --- DISPLAY LOGIC ---
+    if "tournament_results" in st.session_state:
+        ideas = st.session_state.tournament_results
+
+        st.divider()
+
+        # 1. HEADER & DOWNLOAD
+        c1, c2 = st.columns([3, 1])
+        with c1:
+            st.subheader(f"🏆 Tournament Results ({len(ideas)} ideas)")
+        with c2:
+            st.download_button(
+                label="📥 Download Report",
+                data=lambda: generate_csv_report(ideas),
+                file_name="ideaforge_tournament.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
+
+        # 2. STANDINGS (already ordered: furthest stage first, then score)
+        import pandas as pd
+        st.dataframe(
+            pd.DataFrame([{
+                "Rank": rank,
+                "Title": idea.title,
+                "Stage": stage_label(idea.stop_reason),
+                "Overall": f"{idea.score_overall:.1f}",
+                "Feasibility": idea.score_feasibility,
+                "Moat": idea.score_moat,
+                "Market": idea.score_market,
+                "Refinements": idea.iteration_count - 1,
+                "Pitch": idea.description
+            } for rank, idea in enumerate(ideas, start=1)]),
+            column_config={
+                "Overall": st.column_config.ProgressColumn(
+                    "Overall Score", format="%s", min_value=0, max_value=10
+                ),
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+
+        # 3. FINALISTS (the ideas that got the full treatment)
+        st.markdown("### 📝 Finalists")
+        for idea in ideas:
+            if idea.stop_reason not in ("winner", "finalist"):
+                break
+            with st.container(border=True):
+                head_c1, head_c2 = st.columns([3, 1])
+                with head_c1:
+                    st.markdown(f"#### {stage_label(idea.stop_reason)}: {idea.title}")
+                    st.markdown(f"_{idea.description}_")
+                with head_c2:
+                    st.metric("Overall Score", f"{idea.score_overall:.1f}")
+
+                m1, m2, m3 = st.columns(3)
+                m1.metric("Feasibility", f"{idea.score_feasibility}/10")
+                m2.metric("Moat", f"{idea.score_moat}/10")
+                m3.metric("Market", f"{idea.score_market}/10")
+
+                with st.expander("🕵️ Market Research Data"):
+                    st.info(idea.market_research or "No research data available.")
+                with st.expander("🔥 Final Critique"):
+                    st.warning(idea.critique)
@@ -0,0 +1,349 @@
+import atexit
+import functools
+import inspect
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from langchain_core.callbacks import BaseCallbackHandler
+from src.database import DB_NAME
+
+# ==========================================
+# TRACING (spans around graph nodes, Gemini calls and searches)
+# ==========================================
+# A span is one timed unit of work. Spans nest (node -> llm / search) and carry the id of the
+# battle they belong to, taken from a context variable so nothing has to be threaded through
+# function arguments. LangGraph copies the context into the threads that run sync nodes;
+# our own thread pools submit with contextvars.copy_context() for the same reason.
+
+TRACE_DB_NAME = os.path.join(os.path.dirname(DB_NAME), "traces.db")
+TRACING_ENABLED = os.getenv("IDEAFORGE_TRACING", "1") != "0"
+
+# Gemini 2.5 Flash list prices in USD per million tokens (override if your pricing differs)
+INPUT_COST_PER_MTOK = float(os.getenv("IDEAFORGE_INPUT_COST_PER_MTOK", "0.30"))
+OUTPUT_COST_PER_MTOK = float(os.getenv("IDEAFORGE_OUTPUT_COST_PER_MTOK", "2.50"))
+
+_session_id = ContextVar("trace_session_id", default=None)
+_current_span = ContextVar("trace_current_span", default=None)
+
+
+class Span:
+    """Mutable record of one unit of work; written to the sink when it ends"""
+
+    def __init__(self, kind: str, name: str, parent=None):
+        self.id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.id if parent else None
+        self.session_id = _session_id.get()
+        self.kind = kind
+        self.name = name
+        self.started_at = time.time()
+        self.duration_ms = None
+        self.status = "ok"
+        self.error = None
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.cache_hit = False
+        self.retries = 0
+        self.attrs = {}
+
+
+class TraceSink:
+    """Finished spans in SQLite (one row per span).
+
+    write() only queues the span: a background thread commits whatever has queued up in one
+    transaction on its own connection, so spans cost no disk I/O on the traced call's thread.
+    """
+
+    def __init__(self, path=TRACE_DB_NAME):
+        self.path = path
+        self.pid = os.getpid()
+        self._queue = queue.Queue()
+        self._init_db()
+        threading.Thread(target=self._write_batches, name="trace-writer", daemon=True).start()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute('''CREATE TABLE IF NOT EXISTS spans (
+                            id TEXT PRIMARY KEY,
+                            parent_id TEXT,
+                            session_id TEXT,
+                            kind TEXT,
+                            name TEXT,
+                            started_at REAL,
+                            duration_ms REAL,
+                            status TEXT,
+                            error TEXT,
+                            prompt_tokens INTEGER,
+                            output_tokens INTEGER,
+                            cache_hit INTEGER,
+                            retries INTEGER,
+                            attrs JSON
+                        )''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_spans_started ON spans(started_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_spans_session ON spans(session_id)")
+        conn.commit()
+        conn.close()
+
+    def write(self, span: Span):
+        self._queue.put(
+            (span.id, span.parent_id, span.session_id, span.kind, span.name, span.started_at, span.duration_ms,
+             span.status, span.error, span.prompt_tokens, span.output_tokens, int(span.cache_hit), span.retries,
+             json.dumps(span.attrs) if span.attrs else None)
+        )
+
+    def _write_batches(self):
+        conn = self._connect()
+        conn.execute("PRAGMA synchronous=NORMAL")
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(
+                        '''INSERT INTO spans (id, parent_id, session_id, kind, name, started_at, duration_ms, status, error,
+                                              prompt_tokens, output_tokens, cache_hit, retries, attrs)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                        batch
+                    )
+            except sqlite3.Error as e:
+                # Tracing must never take a battle down
+                print(f"--- ⚠️ {len(batch)} trace(s) not recorded ({e}) ---")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Blocks until every span written so far is on disk"""
+        self._queue.join()
+
+    def recent_spans(self, limit: int = 20000):
+        """Newest spans first, as dicts"""
+        self.flush()
+        conn = self._connect()
+        cursor = conn.execute('''SELECT session_id, kind, name, started_at, duration_ms, status,
+                                        prompt_tokens, output_tokens, cache_hit, retries, attrs
+                                 FROM spans ORDER BY started_at DESC LIMIT ?''', (limit,))
+        keys = [col[0] for col in cursor.description]
+        rows = [dict(zip(keys, row)) for row in cursor.fetchall()]
+        conn.close()
+        for row in rows:
+            row["attrs"] = json.loads(row["attrs"]) if row["attrs"] else {}
+        return rows
+
+    def clear(self):
+        self.flush()
+        conn = self._connect()
+        conn.execute("DELETE FROM spans")
+        conn.commit()
+        conn.close()
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+def get_sink() -> TraceSink:
+    """This process's sink (a forked worker gets its own: the parent's writer thread doesn't survive the fork)"""
+    global _sink
+    with _sink_lock:
+        if _sink is None or _sink.pid != os.getpid():
+            _sink = TraceSink()
+        return _sink
+
+@atexit.register
+def flush():
+    """Writes out this process's queued spans (also runs at exit and when a session() block ends)"""
+    if _sink is not None and _sink.pid == os.getpid():
+        _sink.flush()
+
+
+def estimate_tokens(text) -> int:
+    """Rough token count (~4 characters per token) for budgeting prompts before they are sent"""
+    return (len(str(text)) + 3) // 4
+
+# --- Recording ---
+
+@contextmanager
+def session(session_id):
+    """Attribute every span started inside the block (and in threads it spawns) to this battle"""
+    token = _session_id.set(session_id)
+    try:
+        yield
+    finally:
+        _session_id.reset(token)
+        # Process-pool workers exit without running atexit, so a battle's spans are written when it ends
+        flush()
+
+@contextmanager
+def span(kind: str, name: str, **attrs):
+    """Time the block as a span; yields the Span (or None when tracing is off)"""
+    if not TRACING_ENABLED:
+        yield None
+        return
+
+    current = Span(kind, name, parent=_current_span.get())
+    current.attrs.update(attrs)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.error = f"{type(e).__name__}: {e}"[:500]
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - start) * 1000
+        _current_span.reset(token)
+        try:
+            get_sink().write(current)
+        except sqlite3.Error as e:
+            # Tracing must never take a battle down (the sink's table couldn't be created)
+            print(f"--- ⚠️ Trace not recorded ({e}) ---")
+
+def traced(kind: str, name: str):
+    """Decorator version of span() for sync and async functions"""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(kind, name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(kind, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def current_span():
+    return _current_span.get()
+
+def record_cache_hit():
+    if (active := _current_span.get()) is not None:
+        active.cache_hit = True
+
+def record_retry():
+    if (active := _current_span.get()) is not None:
+        active.retries += 1
+
+def record_prompt_inputs(target, inputs: dict):
+    """Estimated tokens of each prompt variable, so oversized inputs show up per prompt"""
+    if target is not None:
+        target.attrs["input_tokens"] = {key: estimate_tokens(value) for key, value in inputs.items()}
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Adds the token usage Gemini reports to a span (pass it in the chain's callbacks)"""
+
+    def __init__(self, target: Span):
+        self.target = target
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                self.target.prompt_tokens += usage.get("input_tokens", 0)
+                self.target.output_tokens += usage.get("output_tokens", 0)
+
+
+def llm_callbacks(target):
+    """Config fragment that records token usage on `target` (merge it into the inherited config; empty when tracing is off)"""
+    return {"callbacks": [TokenUsageCallback(target)]} if target is not None else {}
+
+
+# --- Reporting (Performance page) ---
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def token_cost(prompt_tokens, output_tokens):
+    return prompt_tokens / 1e6 * INPUT_COST_PER_MTOK + output_tokens / 1e6 * OUTPUT_COST_PER_MTOK
+
+def latency_summary(spans, kind):
+    """Per-name call count, latency percentiles (ms), error count, cache hit rate and retries"""
+    by_name = {}
+    for s in spans:
+        if s["kind"] == kind and s["duration_ms"] is not None:
+            by_name.setdefault(s["name"], []).append(s)
+
+    summary = []
+    for name, group in sorted(by_name.items()):
+        durations = [s["duration_ms"] for s in group]
+        summary.append({
+            "name": name,
+            "calls": len(group),
+            "p50_ms": percentile(durations, 50),
+            "p95_ms": percentile(durations, 95),
+            "p99_ms": percentile(durations, 99),
+            "max_ms": max(durations),
+            "errors": sum(s["status"] == "error" for s in group),
+            "cache_hit_rate": sum(s["cache_hit"] for s in group) / len(group),
+            "retries": sum(s["retries"] for s in group),
+            "prompt_tokens": sum(s["prompt_tokens"] for s in group),
+            "output_tokens": sum(s["output_tokens"] for s in group),
+        })
+    return summary
+
+def prompt_budget(spans):
+    """Per LLM step: average estimated tokens of each prompt variable, and the average Gemini reported"""
+    by_name = {}
+    for s in spans:
+        if s["kind"] == "llm" and s["attrs"].get("input_tokens"):
+            by_name.setdefault(s["name"], []).append(s)
+
+    summary = []
+    for name, group in sorted(by_name.items()):
+        keys = sorted({key for s in group for key in s["attrs"]["input_tokens"]})
+        billed = [s["prompt_tokens"] for s in group if not s["cache_hit"] and s["prompt_tokens"]]
+        summary.append({
+            "name": name,
+            "calls": len(group),
+            "inputs": {key: sum(s["attrs"]["input_tokens"].get(key, 0) for s in group) / len(group) for key in keys},
+            "avg_prompt_tokens": sum(billed) / len(billed) if billed else None,
+        })
+    return summary
+
+def battle_costs(spans):
+    """One row per traced battle: LLM calls, billed tokens (cache hits are free) and estimated cost"""
+    battles = {}
+    for s in spans:
+        if not s["session_id"]:
+            continue
+        b = battles.setdefault(s["session_id"], {
+            "session_id": s["session_id"], "started_at": s["started_at"], "ended_at": s["started_at"],
+            "llm_calls": 0, "cached_calls": 0, "searches": 0, "prompt_tokens": 0, "output_tokens": 0,
+        })
+        b["started_at"] = min(b["started_at"], s["started_at"])
+        b["ended_at"] = max(b["ended_at"], s["started_at"] + (s["duration_ms"] or 0) / 1000)
+        if s["kind"] == "llm":
+            b["llm_calls"] += 1
+            if s["cache_hit"]:
+                b["cached_calls"] += 1
+            else:
+                b["prompt_tokens"] += s["prompt_tokens"]
+                b["output_tokens"] += s["output_tokens"]
+        elif s["kind"] == "search":
+            b["searches"] += 1
+
+    for b in battles.values():
+        b["wall_s"] = b["ended_at"] - b["started_at"]
+        b["cost_usd"] = token_cost(b["prompt_tokens"], b["output_tokens"])
+    return sorted(battles.values(), key=lambda b: b["started_at"], reverse=True)
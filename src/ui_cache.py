@@ -0,0 +1,32 @@
+import streamlit as st
+import src.database as db
+from src.report_generator import generate_csv_report
+
+# ==========================================
+# STREAMLIT CACHES (survive reruns; Streamlit reruns the script on every interaction)
+# ==========================================
+# Resources (compiled graph) live for the whole server process.
+# Data is keyed on db.get_change_counter(), so it is refreshed by writes, not by a timer.
+
+@st.cache_resource(show_spinner=False)
+def get_battle_app():
+    """The compiled, checkpointed battle graph, shared by every session"""
+    from src.graph import build_graph
+    from src.checkpoints import get_checkpointer
+    return build_graph(checkpointer=get_checkpointer())
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def _cached_query(change_counter, query_name, *args, **kwargs):
+    return getattr(db, query_name)(*args, **kwargs)
+
+def query(query_name, *args, **kwargs):
+    """db.<query_name>(...), cached until the next write to the history tables"""
+    return _cached_query(db.get_change_counter(), query_name, *args, **kwargs)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _cached_session_report(change_counter, session_id):
+    return generate_csv_report(db.get_session_ideas(session_id))
+
+def session_report(session_id):
+    """CSV report of a saved battle (only built once per battle)"""
+    return _cached_session_report(db.get_change_counter(), session_id)